@@ -1,9 +1,55 @@
+import importlib
+
 from .tokens import (  # noqa
+    Tokeniser,
     clusterise,
+    clusterise_many,
     clusterize,
+    clusterize_many,
+    compile,
+    cv_skeleton,
     replace_digits_with_chao,
     tokenise,
+    tokenise_many,
+    tokenise_spans,
     tokenize,
+    tokenize_many,
 )
 
 __version__ = '0.4.2'
+
+
+"""
+The names of the public API that are defined in the package's other modules,
+mapped to the latter. These are imported on first access, so that importing
+ipatok only involves the tokens and ipa modules.
+"""
+LAZY_NAMES = {
+    'IncrementalTokeniser': 'incremental',
+    'Profile': 'profiling',
+    'profile': 'profiling',
+    'clusterise_array': 'arrays',
+    'tokenise_array': 'arrays',
+    'Vocabulary': 'vocab',
+    'SegmentCounter': 'counts',
+    'MappedCorpus': 'corpus',
+    'TokenisedCorpus': 'corpus',
+    'open_corpus': 'corpus',
+    'write_corpus': 'corpus',
+}
+
+
+def __getattr__(name):
+    """
+    Import the module that defines the given name of the public API on first
+    access to the name, the way ipa.py does with its chart attribute.
+    """
+    if name in LAZY_NAMES:
+        module = importlib.import_module(f'.{LAZY_NAMES[name]}', __name__)
+        return getattr(module, name)
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted([*globals(), *LAZY_NAMES])
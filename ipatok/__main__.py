@@ -0,0 +1,5 @@
+from ipatok.cli import main
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import asyncio
+import collections
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from ipatok import tokens
+
+
+async def atokenise_many(
+    strings,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+    batch_size=1000,
+    max_pending=2,
+    executor=None,
+):
+    """
+    Asynchronously generate the tokens of each of the IPA strings of the given
+    iterable or async iterable, in the input order. Raise ValueError if there
+    is a problem.
+
+    The strings are tokenised in batches of batch_size, in the executor (by
+    default, the event loop's default executor), so that the event loop is not
+    blocked. At most max_pending batches are in the executor at a time; no
+    more strings are read from the input until the output of the oldest batch
+    is consumed. If the executor is a ProcessPoolExecutor, the options are
+    sent to the workers with each batch, so the merge function should be a
+    module-level function; charts other than the default one are sent with
+    each batch too, and the workers compile a new tokeniser for each.
+
+    The other keyword arguments are the same as those of tokenise.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = tokens.compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+
+    async for output in aprocess_many(
+        tokeniser, 'tokenise', strings, batch_size, max_pending, executor
+    ):
+        yield output
+
+
+async def aclusterise_many(
+    strings,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+    batch_size=1000,
+    max_pending=2,
+    executor=None,
+):
+    """
+    Like atokenise_many but generate the consonant and vowel clusters of each
+    of the IPA strings.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = tokens.compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+
+    async for output in aprocess_many(
+        tokeniser, 'clusterise', strings, batch_size, max_pending, executor
+    ):
+        yield output
+
+
+async def aprocess_many(
+    tokeniser, method, strings, batch_size, max_pending, executor=None
+):
+    """
+    Asynchronously generate the output of the tokeniser's method for each of
+    the strings, processing these in batches in the executor.
+
+    Helper for atokenise_many(strings, ..) and aclusterise_many(strings, ..).
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size should be a positive integer')
+
+    if max_pending < 1:
+        raise ValueError('max_pending should be a positive integer')
+
+    if isinstance(executor, ProcessPoolExecutor):
+        tokeniser.ensure_picklable()
+        func = functools.partial(
+            tokens.work_with_options, tokeniser.options, method
+        )
+    else:
+        func = functools.partial(tokeniser.process_many, method)
+
+    loop = asyncio.get_running_loop()
+    pending = collections.deque()
+
+    try:
+        async for batch in make_batches(strings, batch_size):
+            pending.append(loop.run_in_executor(executor, func, batch))
+
+            if len(pending) >= max_pending:
+                for output in await pending.popleft():
+                    yield output
+
+        while pending:
+            for output in await pending.popleft():
+                yield output
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def make_batches(strings, batch_size):
+    """
+    Asynchronously generate lists of up to batch_size consecutive strings of
+    the given iterable or async iterable.
+
+    Helper for aprocess_many(..).
+    """
+    batch = []
+
+    if hasattr(strings, '__aiter__'):
+        async for string in strings:
+            batch.append(string)
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    else:
+        for string in strings:
+            batch.append(string)
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+"""
+Provide for the alternative spellings.
+"""
+atokenize_many = atokenise_many
+aclusterize_many = aclusterise_many
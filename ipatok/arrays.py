@@ -0,0 +1,162 @@
+from ipatok import tokens
+
+
+def tokenise_array(
+    array,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+):
+    """
+    Tokenise each of the IPA strings of a NumPy array or of a pyarrow string
+    array (StringArray, LargeStringArray, DictionaryArray or ChunkedArray of
+    these). Raise ValueError if there is a problem.
+
+    For pyarrow input the output is a LargeListArray of the tokens (a
+    ChunkedArray thereof if the input is chunked), with nulls where the input
+    is null; its 64-bit offsets do not overflow however many tokens there
+    are. For NumPy input the output is a (values, offsets) tuple of NumPy
+    arrays where the tokens of the i-th string are
+    values[offsets[i]:offsets[i+1]]. NumPy arrays of dtype object should only
+    contain strings.
+
+    Each distinct string is tokenised only once and the output is assembled
+    with bulk array operations. The keyword arguments are the same as those of
+    tokenise.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = tokens.compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return process_array(tokeniser, 'tokenise', array)
+
+
+def clusterise_array(
+    array,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+):
+    """
+    Like tokenise_array but return the consonant and vowel clusters of each of
+    the IPA strings.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = tokens.compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return process_array(tokeniser, 'clusterise', array)
+
+
+def process_array(tokeniser, method, array):
+    """
+    Apply the specified method of the tokeniser to each of the strings of the
+    array, dispatching on the latter's type.
+
+    Helper for tokenise_array(array, ..) and clusterise_array(array, ..).
+    """
+    if type(array).__module__.split('.')[0] == 'pyarrow':
+        return process_arrow(tokeniser, method, array)
+
+    return process_numpy(tokeniser, method, array)
+
+
+def process_arrow(tokeniser, method, array):
+    """
+    Return the pyarrow LargeListArray (or ChunkedArray of such) with the
+    output of the method for each of the strings of the pyarrow array. The
+    distinct strings are found by dictionary-encoding the array, then their
+    outputs are taken by the dictionary indices.
+
+    Helper for process_array(tokeniser, method, array).
+    """
+    import pyarrow
+    import pyarrow.compute
+
+    if isinstance(array, pyarrow.ChunkedArray):
+        return pyarrow.chunked_array(
+            [
+                process_arrow(tokeniser, method, chunk)
+                for chunk in array.chunks
+            ],
+            type=pyarrow.large_list(pyarrow.large_string()),
+        )
+
+    if isinstance(array, pyarrow.DictionaryArray):
+        value_type = array.dictionary.type
+    else:
+        value_type = array.type
+
+    if not (
+        pyarrow.types.is_string(value_type)
+        or pyarrow.types.is_large_string(value_type)
+    ):
+        raise TypeError(f'Expected a string array, got {array.type}')
+
+    if not isinstance(array, pyarrow.DictionaryArray):
+        array = pyarrow.compute.dictionary_encode(array)
+
+    strings = array.dictionary.to_pylist()
+    values, offsets = getattr(tokeniser, method + '_many')(strings, flat=True)
+
+    unique = pyarrow.LargeListArray.from_arrays(
+        pyarrow.array(offsets, type=pyarrow.int64()),
+        pyarrow.array(values, type=pyarrow.large_string()),
+    )
+
+    return unique.take(array.indices)
+
+
+def process_numpy(tokeniser, method, array):
+    """
+    Return the (values, offsets) tuple of NumPy arrays with the output of the
+    method for each of the strings of the NumPy array. The distinct strings are
+    found with numpy.unique, then the values are gathered by index.
+
+    Helper for process_array(tokeniser, method, array).
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise TypeError(
+            f'Expected a NumPy or pyarrow array, got {type(array).__name__}'
+        )
+
+    array = numpy.asarray(array)
+
+    if array.dtype.kind not in ('U', 'O'):
+        raise TypeError(f'Expected an array of strings, got {array.dtype}')
+
+    if array.dtype.kind == 'O':
+        for item in array.flat:
+            if not isinstance(item, str):
+                raise ValueError(f'Expected a string, got {item!r}')
+
+    strings, inverse = numpy.unique(array.ravel(), return_inverse=True)
+    values, offsets = getattr(tokeniser, method + '_many')(
+        strings.tolist(), flat=True
+    )
+
+    offsets = numpy.frombuffer(offsets, dtype=numpy.uint64).astype(numpy.int64)
+    values = numpy.array(values, dtype=str)
+
+    starts = offsets[:-1][inverse]
+    lengths = numpy.diff(offsets)[inverse]
+
+    out_offsets = numpy.zeros(len(inverse) + 1, dtype=numpy.int64)
+    numpy.cumsum(lengths, out=out_offsets[1:])
+
+    indices = numpy.arange(out_offsets[-1], dtype=numpy.int64)
+    indices += numpy.repeat(starts - out_offsets[:-1], lengths)
+
+    return values[indices], out_offsets
@@ -0,0 +1,238 @@
+import itertools
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import ipatok
+from ipatok import ipa, tokens
+from ipatok.benchmarks import reference
+
+
+"""
+The keyword arguments of tokenise that are benchmarked in all combinations.
+"""
+FLAGS = ['strict', 'replace', 'diphthongs', 'tones', 'unknown']
+
+
+"""
+The tokenising engines that are benchmarked and checked against the reference
+implementation, as the keyword arguments of tokens.compile(..) that select
+them.
+"""
+ENGINES = {
+    'loop': {},
+    'cached': {'cache_size': 4096},
+}
+
+
+def make_corpus(
+    size, seed=0, vocab_size=None, substitutes=False, digits=False
+):
+    """
+    Return a list of size synthetic IPA strings. The strings are drawn from a
+    vocabulary of vocab_size word types with Zipfian frequencies, mostly single
+    words with the occasional multi-word phrase, as is typical of lexicons and
+    transcribed speech. The words are IPA-compliant, so that they can be
+    tokenised in strict mode.
+
+    If substitutes=True, sprinkle in common non-IPA substitutes (as handled by
+    replace_substitutes). If digits=True, use digits instead of Chao letters
+    for tones (as handled by replace_digits_with_chao).
+    """
+    rnd = random.Random(seed)
+
+    if vocab_size is None:
+        vocab_size = max(size // 10, 1)
+
+    chart = ipa.chart
+    consonants = sorted(chart.consonants)
+    vowels = sorted(chart.vowels)
+    common = list('ptkbdgmnlrsjwaeiou')
+    common = [
+        char for char in common if char in chart.consonants | chart.vowels
+    ]
+    diacritics = ['ʰ', 'ʲ', 'ʷ', 'ʼ', '̃', '̥', '̯']
+    tones = ['˥', '˧', '˩', '˥˩', '˨˩˦']
+    substitutes_list = sorted(chart.replacements)
+
+    def make_segment(vowel):
+        if rnd.random() < 0.7:
+            pool = [char for char in common if (char in chart.vowels) == vowel]
+        else:
+            pool = vowels if vowel else consonants
+
+        segment = rnd.choice(pool)
+
+        if not vowel and rnd.random() < 0.05:
+            segment += '͡' + rnd.choice(consonants)
+        if rnd.random() < 0.1:
+            segment += rnd.choice(diacritics)
+        if rnd.random() < 0.05:
+            segment += 'ː'
+        if substitutes and rnd.random() < 0.05:
+            segment = rnd.choice(substitutes_list)
+
+        return segment
+
+    def make_word():
+        length = max(1, min(int(rnd.lognormvariate(1.7, 0.4)), 20))
+        vowel = rnd.random() < 0.3
+        word = 'ˈ' if rnd.random() < 0.2 else ''
+
+        for _ in range(length):
+            word += make_segment(vowel)
+            if rnd.random() < 0.7:
+                vowel = not vowel
+            if vowel and rnd.random() < 0.05:
+                word += rnd.choice(
+                    ['1', '55', '214', '51'] if digits else tones
+                )
+
+        return word
+
+    vocab = [make_word() for _ in range(vocab_size)]
+    weights = [1 / rank for rank in range(1, vocab_size + 1)]
+
+    corpus = []
+
+    for _ in range(size):
+        num_words = 1 if rnd.random() < 0.8 else rnd.randint(2, 4)
+        corpus.append(' '.join(rnd.choices(vocab, weights, k=num_words)))
+
+    return corpus
+
+
+def count_words(strings):
+    """
+    Return the total number of whitespace-separated words in the strings.
+    """
+    return sum(len(string.split()) for string in strings)
+
+
+def measure(func, strings, repeat=3):
+    """
+    Apply func to each of the strings, repeat times, and return the best
+    throughput in words per second.
+    """
+    num_words = count_words(strings)
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for string in strings:
+            func(string)
+        best = min(best, time.perf_counter() - start)
+
+    return num_words / best if best else float('inf')
+
+
+def measure_import(repeat=3):
+    """
+    Return the best wall time in seconds that it takes a fresh interpreter to
+    import ipatok, less the time it takes it to start.
+    """
+
+    def run(code):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    return max(run('import ipatok') - run('pass'), 0.0)
+
+
+def measure_chart_load(repeat=3):
+    """
+    Return the best time in seconds that it takes to load the default chart
+    and replacements files.
+    """
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chart = ipa.Chart()
+        chart.load_ipa(ipa.IPA_CHART_PATH)
+        chart.load_replacements(ipa.REPLACEMENTS_PATH)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def run(size=10000, repeat=3, seed=0, include_import=True):
+    """
+    Run the benchmarks on synthetic corpora of the given size and return the
+    results as a JSON-serialisable dict. Throughputs are in words per second,
+    times are in seconds.
+    """
+    corpus = make_corpus(size, seed)
+    results = {}
+
+    for comb in itertools.product([False, True], repeat=len(FLAGS)):
+        kwargs = dict(zip(FLAGS, comb))
+        name = ','.join(flag for flag in FLAGS if kwargs[flag]) or 'default'
+        results[f'tokenise[{name}]'] = measure(
+            lambda string: tokens.tokenise(string, **kwargs), corpus, repeat
+        )
+
+    for name, kwargs in ENGINES.items():
+        results[f'tokenise[engine={name}]'] = measure(
+            tokens.compile(**kwargs).tokenise, corpus, repeat
+        )
+
+    results['tokenise[reference]'] = measure(
+        reference.tokenise, corpus, repeat
+    )
+
+    results['clusterise'] = measure(tokens.clusterise, corpus, repeat)
+    results['normalise'] = measure(tokens.normalise, corpus, repeat)
+
+    results['replace_substitutes'] = measure(
+        ipa.replace_substitutes,
+        make_corpus(size, seed, substitutes=True),
+        repeat,
+    )
+    results['replace_digits_with_chao'] = measure(
+        tokens.replace_digits_with_chao,
+        make_corpus(size, seed, digits=True),
+        repeat,
+    )
+
+    results['chart_load_time'] = measure_chart_load(repeat)
+
+    if include_import:
+        results['import_time'] = measure_import(repeat)
+
+    return {
+        'meta': {
+            'ipatok': ipatok.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'size': size,
+            'words': count_words(corpus),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(old, new):
+    """
+    Return a list of (name, old value, new value, ratio) tuples for the results
+    present in both of the given run outputs. For throughputs a ratio above 1
+    is an improvement; for times it is a regression.
+    """
+    rows = []
+
+    for name, new_value in new['results'].items():
+        if name in old['results']:
+            old_value = old['results'][name]
+            ratio = new_value / old_value if old_value else float('inf')
+            rows.append((name, old_value, new_value, ratio))
+
+    return rows
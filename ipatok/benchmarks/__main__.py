@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+
+from ipatok.benchmarks import compare, run
+
+
+def main(argv=None):
+    """
+    Run the benchmarks, print the results as JSON and optionally save them or
+    compare them against the results of an earlier run.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m ipatok.benchmarks',
+        description='Benchmark ipatok on synthetic corpora.',
+    )
+    parser.add_argument(
+        '--size',
+        type=int,
+        default=10000,
+        help='number of strings per corpus; defaults to 10000',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='number of runs, the best of which is kept; defaults to 3',
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='seed of the corpus generator; defaults to 0',
+    )
+    parser.add_argument(
+        '--no-import',
+        action='store_true',
+        help='do not measure the import time',
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        help='path to save the results to, as JSON',
+    )
+    parser.add_argument(
+        '--compare',
+        help='path to the JSON results of an earlier run to compare against',
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat, args.seed, not args.no_import)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            old = json.load(f)
+
+        for name, old_value, new_value, ratio in compare(old, results):
+            values = f'{old_value:>12.4g} {new_value:>12.4g} {ratio:>7.2f}'
+            print(f'{name:<48} {values}')
+    else:
+        json.dump(results, sys.stdout, indent=4)
+        print()
+
+
+if __name__ == '__main__':
+    main()
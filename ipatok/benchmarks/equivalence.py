@@ -0,0 +1,127 @@
+import functools
+import itertools
+import random
+
+from ipatok import ipa, tokens
+from ipatok.benchmarks import ENGINES, FLAGS, reference
+
+
+"""
+Symbols that are not in the chart but that the fuzz strings should include:
+combining marks and modifier letters that are classified as diacritics or
+tones in non-strict mode only, letters outside of the IPA, symbols that are
+unknown in any mode, and whitespace.
+"""
+EXTRA_SYMBOLS = [
+    '\u0300',
+    '\u0323',
+    '\u0335',
+    '\u0362',
+    '\u02c0',
+    '\ua70d',
+    '\ua708',
+    '\u0393',
+    '\u00df',
+    '$',
+    '_',
+    '-',
+    '/',
+    '1',
+    "'",
+    '\ufdd0',
+    '\ufdd6',
+    ' ',
+    '\t',
+]
+
+
+def get_symbols(chart=None):
+    """
+    Return the list of symbol groups that the fuzz strings are made of: the
+    letters of the chart, its other symbols (diacritics, tie bars, lengths,
+    suprasegmentals and tones), the substitutes and precomposed letters, and
+    the extra symbols.
+    """
+    if chart is None:
+        chart = ipa.get_chart()
+
+    return [
+        sorted(chart.consonants | chart.vowels),
+        sorted(
+            chart.diacritics
+            | chart.tie_bars
+            | chart.lengths
+            | chart.suprasegmentals
+            | chart.tones
+        ),
+        sorted(set(chart.replacements) | set(chart.precomposed.values())),
+        EXTRA_SYMBOLS,
+    ]
+
+
+def make_fuzz_corpus(size, seed=0, max_length=12, chart=None):
+    """
+    Return a list of size random strings of up to max_length symbols of the
+    chart and otherwise. Unlike make_corpus(..), the strings are mostly not
+    IPA-compliant, so that they also exercise the error handling and the
+    treatment of unknown symbols.
+    """
+    rnd = random.Random(seed)
+    groups = get_symbols(chart)
+    weights = [6, 4, 1, 1]
+
+    return [
+        ''.join(
+            rnd.choice(rnd.choices(groups, weights)[0])
+            for _ in range(rnd.randint(0, max_length))
+        )
+        for _ in range(size)
+    ]
+
+
+def get_output(func, string):
+    """
+    Return the output of func(string) or, if it raises ValueError, an
+    ('error', message) tuple, so that errors can be compared too.
+    """
+    try:
+        return func(string)
+    except ValueError as error:
+        return ('error', str(error))
+
+
+def find_mismatches(engine, strings, merge=None, chart=None):
+    """
+    Tokenise and clusterise each of the strings with the given engine (one of
+    the keys of ENGINES) and with the reference implementation, using each
+    combination of the flags, and return the list of (method, flags, string,
+    expected, actual) tuples for which the outputs differ. An empty list means
+    that the engine is equivalent to the reference on these strings.
+    """
+    mismatches = []
+
+    for comb in itertools.product([False, True], repeat=len(FLAGS)):
+        flags = dict(zip(FLAGS, comb))
+        tokeniser = tokens.compile(
+            **flags, merge=merge, chart=chart, **ENGINES[engine]
+        )
+
+        for method in ['tokenise', 'clusterise']:
+            for string in strings:
+                expected = get_output(
+                    functools.partial(
+                        getattr(reference, method),
+                        **flags,
+                        merge=merge,
+                        chart=chart,
+                    ),
+                    string,
+                )
+                actual = get_output(getattr(tokeniser, method), string)
+
+                if actual != expected:
+                    mismatches.append(
+                        (method, flags, string, expected, actual)
+                    )
+
+    return mismatches
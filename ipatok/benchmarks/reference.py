@@ -0,0 +1,331 @@
+import unicodedata
+
+from ipatok import ipa
+
+
+def is_letter(char, strict, chart):
+    """
+    Check whether the character is a letter (as opposed to a diacritic or
+    suprasegmental).
+
+    In strict mode return True only if the letter is part of the IPA spec.
+    """
+    if (char in chart.consonants) or (char in chart.vowels):
+        return True
+
+    if not strict:
+        return unicodedata.category(char) in ['Ll', 'Lo', 'Lt', 'Lu']
+
+    return False
+
+
+def is_vowel(char, chart):
+    """
+    Check whether the character is a vowel letter.
+    """
+    if is_letter(char, True, chart):
+        return char in chart.vowels
+
+    return False
+
+
+def is_tie_bar(char, chart):
+    """
+    Check whether the character is one of the two IPA tie bar symbols.
+    """
+    return char in chart.tie_bars
+
+
+def is_diacritic(char, strict, chart):
+    """
+    Check whether the character is a diacritic (as opposed to a letter or a
+    suprasegmental).
+
+    In strict mode return True only if the diacritic is part of the IPA spec.
+    """
+    if char in chart.diacritics:
+        return True
+
+    if not strict:
+        return (
+            unicodedata.category(char) in ['Lm', 'Mn', 'Sk']
+            and not is_suprasegmental(char, True, chart)
+            and not is_tie_bar(char, chart)
+            and not 0xA700 <= ord(char) <= 0xA71F
+        )
+
+    return False
+
+
+def is_suprasegmental(char, strict, chart):
+    """
+    Check whether the character is a suprasegmental according to the IPA spec.
+    This includes tones, word accents, and length markers.
+
+    In strict mode return True only if the diacritic is part of the IPA spec.
+    """
+    if (char in chart.suprasegmentals) or (char in chart.lengths):
+        return True
+
+    return is_tone(char, strict, chart)
+
+
+def is_length(char, chart):
+    """
+    Check whether the character is a length marker. Unlike other
+    suprasegmentals, length markers are included in the tokenised output.
+    """
+    return char in chart.lengths
+
+
+def is_tone(char, strict, chart):
+    """
+    Check whether the character is a tone or word accent symbol. In strict mode
+    return True only for the symbols listed in the last group of the chart. If
+    strict=False, also accept symbols that belong to the Modifier Tone Letters
+    Unicode block.
+    """
+    if char in chart.tones:
+        return True
+
+    if not strict:
+        return 0xA700 <= ord(char) <= 0xA71F
+
+    return False
+
+
+def get_precomposed_chars(chart):
+    """
+    Return the set of IPA letters that are defined in normal form C in the
+    chart. As of 2015, this is only the voiceless palatal fricative, ç.
+    """
+    return set(
+        letter
+        for letter in chart.consonants | chart.vowels
+        if unicodedata.normalize('NFD', letter) != letter
+    )
+
+
+def replace_substitutes(string, chart):
+    """
+    Return the given string with all the substitutes in the chart replaced
+    with their IPA-compliant counterparts. At each position of the string the
+    longest substitute that starts there is replaced.
+    """
+    substitutes = sorted(chart.replacements, key=len, reverse=True)
+
+    output = ''
+    index = 0
+
+    while index < len(string):
+        for substitute in substitutes:
+            if string.startswith(substitute, index):
+                output += chart.replacements[substitute]
+                index += len(substitute)
+                break
+        else:
+            output += string[index]
+            index += 1
+
+    return output
+
+
+def normalise(string, chart):
+    """
+    Convert the string to normal form D, except for the letters that are
+    defined in normal form C in the IPA spec.
+
+    Helper for tokenise_word(string, ..).
+    """
+    string = unicodedata.normalize('NFD', string)
+
+    for char_c in get_precomposed_chars(chart):
+        char_d = unicodedata.normalize('NFD', char_c)
+        if char_d in string:
+            string = string.replace(char_d, char_c)
+
+    return string
+
+
+def group(merge_func, tokens):
+    """
+    Group together those of the tokens for which the merge function returns
+    true.
+
+    Helper for tokenise(string, ..).
+    """
+    output = []
+
+    if tokens:
+        output.append(tokens[0])
+
+        for token in tokens[1:]:
+            if merge_func(output[-1], token):
+                output[-1] += token
+            else:
+                output.append(token)
+
+    return output
+
+
+def are_diphthong(tokenA, tokenB, chart):
+    """
+    Check whether the two tokens can form a diphthong: a sequence of vowels of
+    which no more than one is syllabic.
+
+    Helper for tokenise(string, ..).
+    """
+    subtokens = []
+
+    for char in tokenA + tokenB:
+        if is_vowel(char, chart):
+            subtokens.append(char)
+        elif is_diacritic(char, True, chart) or is_length(char, chart):
+            if subtokens:
+                subtokens[-1] += char
+            else:
+                break
+        else:
+            break
+    else:
+        if len([x for x in subtokens if '\u032f' not in x]) < 2:
+            return True
+
+    return False
+
+
+def tokenise_word(string, strict, replace, tones, unknown, chart):
+    """
+    Tokenise the string, assumed to be a single word, into a list of tokens.
+    Raise ValueError if it cannot be tokenised.
+
+    Helper for tokenise(string, ..).
+    """
+    string = normalise(string, chart)
+
+    if replace:
+        string = replace_substitutes(string, chart)
+
+    tokens = []
+
+    for index, char in enumerate(string):
+        if is_letter(char, strict, chart):
+            if tokens and is_tie_bar(string[index - 1], chart):
+                tokens[-1] += char
+            else:
+                tokens.append(char)
+
+        elif is_tie_bar(char, chart):
+            if not tokens:
+                raise ValueError(f'The string starts with a tie bar: {string}')
+            tokens[-1] += char
+
+        elif is_diacritic(char, strict, chart) or is_length(char, chart):
+            if tokens:
+                tokens[-1] += char
+            elif strict:
+                raise ValueError(
+                    f'The string starts with a diacritic: {string}'
+                )
+            else:
+                tokens.append(char)
+
+        elif tones and is_tone(char, strict, chart):
+            if unicodedata.combining(char):
+                if not tokens:
+                    raise ValueError(
+                        f'The string starts with an accent mark: {string}'
+                    )
+                tokens[-1] += char
+            elif tokens and is_tone(tokens[-1][-1], strict, chart):
+                tokens[-1] += char
+            else:
+                tokens.append(char)
+
+        elif is_suprasegmental(char, strict, chart):
+            pass
+
+        elif strict:
+            raise ValueError(
+                f'Unrecognised char: {char} ({unicodedata.name(char)})'
+            )
+
+        elif unknown:
+            tokens.append(char)
+
+    return tokens
+
+
+def tokenise(
+    string,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+):
+    """
+    Tokenise an IPA string into a list of tokens. Raise ValueError if there is
+    a problem. The keyword arguments are the same as those of tokens.tokenise.
+
+    This is a frozen, deliberately unoptimised implementation, going through
+    the string one character at a time and classifying each with the is_
+    functions above. These are copies of those of ipatok.ipa before the
+    latter were optimised, and only use the chart's symbol sets, so that the
+    reference does not depend on any of the code that it is checked against.
+    It should only change if the intended output does.
+    """
+    if chart is None:
+        chart = ipa.get_chart()
+
+    output = []
+
+    for word in string.split():
+        tokens = tokenise_word(word, strict, replace, tones, unknown, chart)
+
+        if diphthongs:
+            tokens = group(lambda a, b: are_diphthong(a, b, chart), tokens)
+
+        if merge is not None:
+            tokens = group(merge, tokens)
+
+        output.extend(tokens)
+
+    return output
+
+
+def clusterise(
+    string,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+):
+    """
+    Tokenise an IPA string and return a list of consonant and vowel clusters.
+    Raise ValueError if there is a problem.
+    """
+    if chart is None:
+        chart = ipa.get_chart()
+
+    clusters = []
+    prev_has_vowel = None
+
+    for token in tokenise(
+        string, strict, replace, diphthongs, tones, unknown, merge, chart
+    ):
+        has_vowel = any(is_vowel(char, chart) for char in token)
+
+        if clusters and has_vowel == prev_has_vowel:
+            clusters[-1] += token
+        else:
+            clusters.append(token)
+
+        prev_has_vowel = has_vowel
+
+    return clusters
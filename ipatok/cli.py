@@ -0,0 +1,332 @@
+import argparse
+import collections
+import csv
+import sys
+
+from ipatok import __version__
+from ipatok import tokens
+
+
+"""
+What is written in place of the tokens of a string that could not be
+tokenised, if --errors=mark.
+"""
+ERROR_MARK = '#ERROR'
+
+
+def get_parser():
+    """
+    Return the argparse.ArgumentParser of the command-line interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog='ipatok',
+        description=(
+            'Tokenise the IPA strings of a file, writing space-separated '
+            'tokens to the output.'
+        ),
+    )
+
+    parser.add_argument(
+        'input',
+        nargs='?',
+        default='-',
+        help='path to the input file; defaults to stdin',
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        default='-',
+        help='path to the output file; defaults to stdout',
+    )
+
+    group = parser.add_argument_group('input format')
+    group.add_argument(
+        '-f',
+        '--format',
+        choices=['lines', 'tsv', 'csv'],
+        default='lines',
+        help=(
+            'lines: each line is an IPA string; tsv, csv: the IPA strings are '
+            'in a column, the other columns are written out as they are; '
+            'defaults to lines'
+        ),
+    )
+    group.add_argument(
+        '-c',
+        '--column',
+        default='1',
+        help=(
+            'the column with the IPA strings, either a 1-based index or, if '
+            '--header is set, a name; defaults to 1'
+        ),
+    )
+    group.add_argument(
+        '--header',
+        action='store_true',
+        help='the first row is a header; it is written out as it is',
+    )
+
+    group = parser.add_argument_group('tokenisation')
+    group.add_argument(
+        '--clusterise',
+        action='store_true',
+        help='output consonant and vowel clusters instead of tokens',
+    )
+    for flag in ['strict', 'replace', 'diphthongs', 'tones', 'unknown']:
+        group.add_argument(
+            f'--{flag}',
+            action='store_true',
+            help=f'same as tokenise(.., {flag}=True)',
+        )
+
+    group = parser.add_argument_group('processing')
+    group.add_argument(
+        '--errors',
+        choices=['raise', 'skip', 'mark'],
+        default='raise',
+        help=(
+            'what to do with strings that cannot be tokenised (e.g. strings '
+            'that start with a tie bar or, with --strict, that include '
+            'non-IPA symbols): raise: abort with an error message; skip: omit '
+            f'the line from the output; mark: output {ERROR_MARK} instead of '
+            'the tokens; defaults to raise'
+        ),
+    )
+    group.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=1,
+        help='number of worker processes; defaults to 1',
+    )
+    group.add_argument(
+        '--chunk-size',
+        type=int,
+        default=1000,
+        help=(
+            'number of lines per task; at most twice as many tasks per '
+            'worker are held in memory; defaults to 1000'
+        ),
+    )
+
+    parser.add_argument(
+        '--version', action='version', version=f'%(prog)s {__version__}'
+    )
+
+    return parser
+
+
+def open_file(path, mode):
+    """
+    Open the file at the specified path for reading (mode='r') or writing
+    (mode='w'); '-' stands for stdin or stdout, respectively.
+    """
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        return open(
+            stream.fileno(), mode, encoding='utf-8', newline='', closefd=False
+        )
+
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_rows(f, format):
+    """
+    Generate the rows of the input file as lists of strings; in lines format
+    each row has a single field.
+    """
+    if format == 'lines':
+        for line in f:
+            yield [line.rstrip('\r\n')]
+    else:
+        yield from csv.reader(f, **get_dialect(format))
+
+
+def get_writer(f, format):
+    """
+    Return a function which writes a row (a list of strings) to the output
+    file in the given format.
+    """
+    if format == 'lines':
+        return lambda row: f.write(row[0] + '\n')
+
+    return csv.writer(f, lineterminator='\n', **get_dialect(format)).writerow
+
+
+def get_dialect(format):
+    """
+    Return the keyword arguments of csv.reader and csv.writer for the given
+    format. TSV fields are never quoted, so quote chars are read and written
+    as they are; as fields cannot contain tabs or newlines, neither are there
+    any chars to escape.
+
+    Helper for read_rows(f, format) and get_writer(f, format).
+    """
+    if format == 'tsv':
+        return {
+            'delimiter': '\t',
+            'quoting': csv.QUOTE_NONE,
+            'quotechar': None,
+        }
+
+    return {'delimiter': ','}
+
+
+def get_column_index(column, header):
+    """
+    Return the 0-based index of the column, specified either by 1-based index
+    or by name. Raise ValueError if the column cannot be found.
+    """
+    if header is not None and column in header:
+        return header.index(column)
+
+    try:
+        index = int(column) - 1
+    except ValueError:
+        raise ValueError(f'Cannot find column: {column}')
+
+    if index < 0:
+        raise ValueError(f'Column indices start from 1: {column}')
+
+    return index
+
+
+def chunk_rows(rows, chunk_size):
+    """
+    Generate lists of up to chunk_size consecutive rows.
+    """
+    chunk = []
+
+    for row in rows:
+        chunk.append(row)
+
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def process_chunk(tokeniser, method, strings):
+    """
+    Apply the specified method of the tokeniser to each of the strings. Return
+    the list of outputs, with the ValueError instead of the output for each of
+    the strings that cannot be tokenised.
+    """
+    func = getattr(tokeniser, method)
+    outputs = []
+
+    for string in strings:
+        try:
+            outputs.append(func(string))
+        except ValueError as error:
+            outputs.append(error)
+
+    return outputs
+
+
+def process_chunk_in_worker(method, strings):
+    """
+    Like process_chunk(..) but with the tokeniser of the worker process.
+
+    Helper for run(..) when there are several workers.
+    """
+    return process_chunk(tokens.worker_tokeniser, method, strings)
+
+
+def run(args, f_in, f_out):
+    """
+    Tokenise the input file according to the parsed command-line arguments,
+    writing the output file as it goes. Raise ValueError if --errors=raise and
+    a string cannot be tokenised, or if the column cannot be found.
+    """
+    tokeniser = tokens.compile(
+        args.strict, args.replace, args.diphthongs, args.tones, args.unknown
+    )
+    method = 'clusterise' if args.clusterise else 'tokenise'
+
+    rows = read_rows(f_in, args.format)
+    write = get_writer(f_out, args.format)
+
+    header = None
+    column = 0
+
+    if args.format != 'lines':
+        if args.header:
+            header = next(rows, None)
+            if header is not None:
+                write(header)
+
+        column = get_column_index(args.column, header)
+
+    line_offset = 2 if header is not None else 1
+
+    def write_chunk(chunk, outputs):
+        nonlocal line_offset
+
+        for line_num, (row, output) in enumerate(
+            zip(chunk, outputs), line_offset
+        ):
+            if isinstance(output, ValueError):
+                if args.errors == 'raise':
+                    raise ValueError(f'line {line_num}: {output}')
+                elif args.errors == 'skip':
+                    continue
+                else:
+                    output = ERROR_MARK
+            else:
+                output = ' '.join(output)
+
+            row = row + [''] * (column + 1 - len(row))
+            write(row[:column] + [output] + row[column + 1 :])
+
+        line_offset += len(chunk)
+
+    def get_strings(chunk):
+        return [row[column] if column < len(row) else '' for row in chunk]
+
+    chunks = chunk_rows(rows, args.chunk_size)
+
+    if args.workers > 1:
+        with tokeniser.make_pool(args.workers) as executor:
+            pending = collections.deque()
+
+            for chunk in chunks:
+                future = executor.submit(
+                    process_chunk_in_worker, method, get_strings(chunk)
+                )
+                pending.append((chunk, future))
+
+                if len(pending) >= args.workers * 2:
+                    chunk, future = pending.popleft()
+                    write_chunk(chunk, future.result())
+
+            while pending:
+                chunk, future = pending.popleft()
+                write_chunk(chunk, future.result())
+    else:
+        for chunk in chunks:
+            outputs = process_chunk(tokeniser, method, get_strings(chunk))
+            write_chunk(chunk, outputs)
+
+
+def main(argv=None):
+    """
+    Entry point of the command-line interface: parse the arguments and run.
+    """
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error('--workers should be a positive integer')
+
+    if args.chunk_size < 1:
+        parser.error('--chunk-size should be a positive integer')
+
+    try:
+        with open_file(args.input, 'r') as f_in:
+            with open_file(args.output, 'w') as f_out:
+                run(args, f_in, f_out)
+    except (OSError, ValueError) as error:
+        parser.exit(1, f'ipatok: error: {error}\n')
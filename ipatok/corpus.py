@@ -0,0 +1,606 @@
+import itertools
+import os
+import os.path
+import sys
+from array import array
+
+from ipatok import __version__
+from ipatok import ipa
+from ipatok import tokens
+from ipatok.vocab import Vocabulary
+
+
+class TokenisedCorpus:
+    """
+    Read-only sequence of token lists, e.g. the output of tokenise_many, that
+    stores all the tokens in a single string instead of as separate string
+    objects. Two arrays of offsets delimit the tokens: the tokens of the i-th
+    item are token_offsets[offsets[i]:offsets[i+1]], and the j-th token is
+    chars[token_offsets[j]:token_offsets[j+1]].
+
+    The token lists are only created when the items are accessed, so that a
+    large tokenised corpus takes a fraction of the memory of a list of lists.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(self, chars='', token_offsets=None, offsets=None):
+        """
+        Init the corpus with the given buffer and arrays of offsets; without
+        these, the corpus is empty. Use the from_ classmethods to create
+        corpora from strings or token lists. Raise ValueError if the offsets
+        are not consistent with each other and with the buffer.
+        """
+        if token_offsets is None:
+            token_offsets = array('Q', [0])
+
+        if offsets is None:
+            offsets = array('Q', [0])
+
+        if (
+            not token_offsets
+            or not offsets
+            or token_offsets[0] != 0
+            or token_offsets[-1] != len(chars)
+            or offsets[0] != 0
+            or offsets[-1] != len(token_offsets) - 1
+        ):
+            raise ValueError('The offsets do not match the tokens')
+
+        self.chars = chars
+        self.token_offsets = token_offsets
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(
+        cls,
+        strings,
+        tokeniser=None,
+        batch_size=100000,
+        workers=None,
+        chunk_size=None,
+        backend=tokens.PROCESS,
+    ):
+        """
+        Tokenise each of the IPA strings of the given iterable and return the
+        corpus of their tokens. Raise ValueError if there is a problem.
+
+        The tokeniser defaults to compile(), i.e. the default options of
+        tokenise. The strings are tokenised in batches of batch_size, each
+        with tokeniser.tokenise_many(batch, flat=True, ..), so that no more
+        than a batch worth of token objects is alive at a time. The other
+        keyword arguments are passed on to tokenise_many.
+        """
+        if tokeniser is None:
+            tokeniser = tokens.compile()
+
+        if batch_size < 1:
+            raise ValueError('batch_size should be a positive integer')
+
+        builder = Builder()
+        strings = iter(strings)
+
+        while True:
+            batch = list(itertools.islice(strings, batch_size))
+
+            if not batch:
+                break
+
+            builder.add_flat(
+                *tokeniser.tokenise_many(
+                    batch, True, workers, chunk_size, backend
+                )
+            )
+
+        return builder.build(cls)
+
+    @classmethod
+    def from_lists(cls, token_lists):
+        """
+        Return the corpus with the token lists of the given iterable.
+        """
+        builder = Builder()
+
+        for token_list in token_lists:
+            builder.add(token_list)
+
+        return builder.build(cls)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        Return the list of tokens of the item at the given index or, if this
+        is a slice, a new corpus with the respective items.
+        """
+        if isinstance(index, slice):
+            return self.get_slice(index)
+
+        size = len(self)
+
+        if index < 0:
+            index += size
+
+        if not 0 <= index < size:
+            raise IndexError('TokenisedCorpus index out of range')
+
+        chars = self.chars
+        bounds = self.token_offsets[
+            self.offsets[index] : self.offsets[index + 1] + 1
+        ]
+
+        return [chars[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, TokenisedCorpus):
+            return NotImplemented
+
+        return (
+            self.chars == other.chars
+            and self.token_offsets == other.token_offsets
+            and self.offsets == other.offsets
+        )
+
+    def __repr__(self):
+        return (
+            f'<TokenisedCorpus: {len(self)} items, {self.num_tokens} tokens>'
+        )
+
+    @property
+    def num_tokens(self):
+        """
+        The total number of tokens in the corpus.
+        """
+        return len(self.token_offsets) - 1
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes taken by the buffer and the arrays of offsets.
+        """
+        return (
+            sys.getsizeof(self.chars)
+            + self.token_offsets.itemsize * len(self.token_offsets)
+            + self.offsets.itemsize * len(self.offsets)
+        )
+
+    def get_slice(self, index):
+        """
+        Return a new corpus with the items of the given slice. Contiguous
+        slices are cut out of the buffer and arrays; others are rebuilt.
+
+        Helper for __getitem__(index).
+        """
+        start, stop, step = index.indices(len(self))
+
+        if step != 1:
+            return self.from_lists(
+                self[item] for item in range(start, stop, step)
+            )
+
+        stop = max(start, stop)
+
+        first_token = self.offsets[start]
+        last_token = self.offsets[stop]
+
+        first_char = self.token_offsets[first_token]
+        last_char = self.token_offsets[last_token]
+
+        return type(self)(
+            self.chars[first_char:last_char],
+            array(
+                'Q',
+                [
+                    offset - first_char
+                    for offset in self.token_offsets[
+                        first_token : last_token + 1
+                    ]
+                ],
+            ),
+            array(
+                'Q',
+                [
+                    offset - first_token
+                    for offset in self.offsets[start : stop + 1]
+                ],
+            ),
+        )
+
+
+class Builder:
+    """
+    Accumulates token lists into the buffer and offsets of a corpus.
+
+    Helper for TokenisedCorpus.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.token_offsets = array('Q', [0])
+        self.offsets = array('Q', [0])
+
+    def add(self, token_list):
+        """
+        Add an item with the given tokens.
+        """
+        self.add_flat(token_list, (0, len(token_list)))
+
+    def add_flat(self, token_list, offsets):
+        """
+        Add the items of the given (tokens, offsets) tuple, in the format
+        returned by tokenise_many(.., flat=True).
+        """
+        num_tokens = len(self.token_offsets) - 1
+
+        self.chunks.append(''.join(token_list))
+        ends = itertools.accumulate(
+            map(len, token_list), initial=self.token_offsets[-1]
+        )
+        self.token_offsets.extend(itertools.islice(ends, 1, None))
+
+        self.offsets.extend(offset + num_tokens for offset in offsets[1:])
+
+    def build(self, cls):
+        """
+        Return an instance of the given TokenisedCorpus class with the items
+        added so far.
+        """
+        return cls(''.join(self.chunks), self.token_offsets, self.offsets)
+
+
+"""
+The first bytes of the files written by write_corpus(..), followed by the
+version of the format.
+"""
+MAGIC = b'IPATOK\x00'
+FORMAT_VERSION = 1
+
+
+class MappedCorpus:
+    """
+    Read-only sequence of token lists backed by a memory-mapped file, as
+    written by write_corpus(..). The tokens are stored as segment IDs, so
+    opening the file only reads its header and vocabulary; the arrays of IDs
+    and offsets are memoryviews of the mapped file, which the OS pages in as
+    they are accessed.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(self, file_path):
+        """
+        Open and map the file. Raise ValueError if it is not a valid corpus
+        file or if it was written on a machine with a different byte order.
+        """
+        import mmap
+
+        with open(file_path, 'rb') as f:
+            self.header = read_header(f, file_path)
+
+            try:
+                vocab_start = align(f.tell())
+                ids_start = align(vocab_start + self.header['vocab'])
+                offsets_start = align(ids_start + 4 * self.header['tokens'])
+                end = offsets_start + 8 * (self.header['items'] + 1)
+            except (KeyError, TypeError):
+                raise ValueError(f'Invalid header in {file_path}') from None
+
+            if self.header.get('byteorder') != sys.byteorder:
+                raise ValueError(f'Wrong byte order: {file_path}')
+
+            if os.fstat(f.fileno()).st_size != end:
+                raise ValueError(f'Truncated corpus file: {file_path}')
+
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        segments = self.mmap[vocab_start : vocab_start + self.header['vocab']]
+        segments = segments.decode('utf-8')
+
+        self.vocabulary = Vocabulary(
+            segments.split('\n') if segments else [], grow=False
+        )
+
+        with memoryview(self.mmap) as view:
+            self.ids = view[ids_start : ids_start + 4 * self.header['tokens']]
+            self.ids = self.ids.cast('I')
+            self.offsets = view[offsets_start:end].cast('Q')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        Return the list of tokens of the item at the given index or, if this
+        is a slice, the list of token lists of the respective items.
+        """
+        if isinstance(index, slice):
+            return [self[item] for item in range(*index.indices(len(self)))]
+
+        return self.vocabulary.decode(self.get_ids(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def num_tokens(self):
+        """
+        The total number of tokens in the corpus.
+        """
+        return len(self.ids)
+
+    def get_ids(self, index):
+        """
+        Return a memoryview of the segment IDs of the item at the given index,
+        without copying them. Raise IndexError if the index is out of range.
+        The memoryview keeps the file mapped, even after close().
+        """
+        size = len(self)
+
+        if index < 0:
+            index += size
+
+        if not 0 <= index < size:
+            raise IndexError('MappedCorpus index out of range')
+
+        return self.ids[self.offsets[index] : self.offsets[index + 1]]
+
+    def close(self):
+        """
+        Release the arrays and unmap the file. The corpus cannot be used
+        afterwards. If memoryviews returned by get_ids(..) are still alive,
+        the file is only unmapped once these are garbage-collected.
+        """
+        self.ids.release()
+        self.offsets.release()
+
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass
+
+
+def write_corpus(file_path, strings, tokeniser=None):
+    """
+    Tokenise each of the IPA strings of the given iterable and write the
+    output to the specified file, which can then be opened with
+    open_corpus(..). Raise ValueError if there is a problem.
+
+    The file starts with MAGIC, a format version byte, the length of a JSON
+    header as uint32 and the header itself, which records the version of
+    ipatok, the chart's digest, the tokeniser's options and a digest of the
+    input strings. It goes on with the vocabulary of segments, one per line,
+    then with an array of uint32 segment IDs and an array of uint64 offsets,
+    as returned by Vocabulary.encode_many(..), in native byte order; each
+    section starts at a multiple of 8 bytes. The file is written to a
+    temporary path first, so that readers never see a half-written file.
+
+    Part of ipatok's public API.
+    """
+    if tokeniser is None:
+        tokeniser = tokens.compile()
+
+    digest = Digest()
+    vocab = Vocabulary([])
+    ids, offsets = vocab.encode_many(map(digest.update, strings), tokeniser)
+
+    header = make_header(tokeniser, digest.hexdigest())
+    header.update(items=len(offsets) - 1, tokens=len(ids))
+
+    def write(f):
+        write_sections(f, header, '\n'.join(vocab).encode('utf-8'))
+        ids.tofile(f)
+        pad(f)
+        offsets.tofile(f)
+
+    ipa.write_atomically(file_path, write)
+
+
+def open_corpus(file_path, strings=None, tokeniser=None):
+    """
+    Return the MappedCorpus of the specified file, as written by
+    write_corpus(..). Raise ValueError if the file is not a valid corpus file.
+
+    If strings is not None, first check whether the file holds the output of
+    the tokeniser (by default, compile()) for these strings; if it does not,
+    or if it does not exist or is not valid, (re-)write it. The strings are
+    read twice, so iterators (e.g. generators) are first read into a list.
+    Merge functions are compared by name only, so changing the code of a
+    merge function does not invalidate the files written with it; files
+    written with lambdas, local functions and other merge functions that
+    cannot be told apart by name are always re-written. Files written by a
+    different version of ipatok are re-written as well.
+
+    Part of ipatok's public API.
+    """
+    if strings is not None:
+        if tokeniser is None:
+            tokeniser = tokens.compile()
+
+        if iter(strings) is strings:
+            strings = list(strings)
+
+        if not is_up_to_date(file_path, strings, tokeniser):
+            write_corpus(file_path, strings, tokeniser)
+
+    return MappedCorpus(file_path)
+
+
+def is_up_to_date(file_path, strings, tokeniser):
+    """
+    Check whether the file is a valid corpus file that holds the output of
+    the tokeniser for the strings.
+
+    Helper for open_corpus(..).
+    """
+    merge = tokeniser.options[5]
+
+    if merge is not None and get_merge_name(merge) is None:
+        return False
+
+    try:
+        with open(file_path, 'rb') as f:
+            header = read_header(f, file_path)
+    except (OSError, ValueError):
+        return False
+
+    digest = Digest()
+
+    for string in strings:
+        digest.update(string)
+
+    expected = make_header(tokeniser, digest.hexdigest())
+
+    return all(header.get(key) == value for key, value in expected.items())
+
+
+def make_header(tokeniser, input_digest):
+    """
+    Return the header dict identifying the output of the tokeniser for the
+    input with the given digest. The tokeniser's cache size is left out, as
+    it does not affect its output. Merge functions that cannot be told apart
+    by name are recorded by their repr.
+
+    Helper for write_corpus(..) and is_up_to_date(..).
+    """
+    strict, replace, diphthongs, tones, unknown, merge = tokeniser.options[:6]
+
+    if merge is not None:
+        merge = get_merge_name(merge) or repr(merge)
+
+    return {
+        'ipatok': __version__,
+        'byteorder': sys.byteorder,
+        'chart': tokeniser.chart.get_digest(),
+        'options': {
+            'strict': strict,
+            'replace': replace,
+            'diphthongs': diphthongs,
+            'tones': tones,
+            'unknown': unknown,
+            'merge': merge,
+        },
+        'input': input_digest,
+    }
+
+
+def get_merge_name(merge):
+    """
+    Return the qualified name of the merge function, or None if the function
+    cannot be told apart from others by its name, as is the case with
+    lambdas, local functions and callables without a __qualname__.
+
+    Helper for is_up_to_date(..) and make_header(..).
+    """
+    qualname = getattr(merge, '__qualname__', None)
+
+    if qualname is None or '<' in qualname:
+        return None
+
+    return f'{merge.__module__}.{qualname}'
+
+
+class Digest:
+    """
+    SHA-256 digest of a sequence of strings.
+
+    Helper for write_corpus(..) and is_up_to_date(..).
+    """
+
+    def __init__(self):
+        import hashlib
+
+        self.hash = hashlib.sha256()
+        self.count = 0
+
+    def update(self, string):
+        """
+        Add the string to the digest and return it unchanged.
+        """
+        data = string.encode('utf-8', 'surrogatepass')
+
+        self.hash.update(len(data).to_bytes(8, 'little'))
+        self.hash.update(data)
+        self.count += 1
+
+        return string
+
+    def hexdigest(self):
+        """
+        Return the digest of the strings added so far, and of their number.
+        """
+        return f'{self.hash.hexdigest()}:{self.count}'
+
+
+def write_sections(f, header, vocab):
+    """
+    Write the magic bytes, the header and the vocabulary to the file object,
+    followed by padding to a multiple of 8 bytes. The header also records the
+    length of the vocabulary in bytes.
+
+    Helper for write_corpus(..).
+    """
+    import json
+
+    header = dict(header, vocab=len(vocab))
+    header = json.dumps(header, ensure_ascii=True).encode('ascii')
+
+    f.write(MAGIC)
+    f.write(bytes([FORMAT_VERSION]))
+    f.write(len(header).to_bytes(4, 'little'))
+    f.write(header)
+    pad(f)
+    f.write(vocab)
+    pad(f)
+
+
+def pad(f):
+    """
+    Write zero bytes to the file object up to the next multiple of 8 bytes,
+    so that the arrays that follow are aligned.
+
+    Helper for write_corpus(..).
+    """
+    f.write(bytes(-f.tell() % 8))
+
+
+def read_header(f, file_path):
+    """
+    Read and return the header dict of the corpus file opened as the given
+    binary file object. Raise ValueError if the file is not a corpus file.
+
+    Helper for MappedCorpus and is_up_to_date(..).
+    """
+    import json
+
+    data = f.read(len(MAGIC) + 5)
+
+    if data[: len(MAGIC) + 1] != MAGIC + bytes([FORMAT_VERSION]):
+        raise ValueError(f'Not an ipatok corpus file: {file_path}')
+
+    size = int.from_bytes(data[-4:], 'little')
+
+    try:
+        return json.loads(f.read(size).decode('ascii'))
+    except ValueError:
+        raise ValueError(f'Invalid header in {file_path}') from None
+
+
+def align(position):
+    """
+    Return the smallest multiple of 8 that is not less than the position.
+
+    Helper for MappedCorpus.
+    """
+    return position + -position % 8
@@ -0,0 +1,333 @@
+import collections
+import functools
+import itertools
+
+from ipatok import tokens
+
+
+class SegmentCounter:
+    """
+    Streaming counts of the segments (i.e. tokens), the n-grams of segments
+    and the consonant and vowel clusters of IPA strings, in total and,
+    optionally, per group (e.g. per language).
+
+    Counters with the same settings can be added together, and they can be
+    pickled, so that the counting can be split among processes.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(self, n=2, clusters=True, boundary=None):
+        """
+        Init an empty counter of the n-grams of segments of length 2 to n
+        (none if n is 1) and, if clusters is True, of the clusters. N-grams
+        do not cross word boundaries; if boundary is not None (e.g. '#'), it
+        is used to pad each word on both sides, so that the n-grams also show
+        which segments start and end words. Raise ValueError if n is not a
+        positive integer.
+        """
+        if not isinstance(n, int) or n < 1:
+            raise ValueError('n should be a positive integer')
+
+        self.n = n
+        self.clusters = clusters
+        self.boundary = boundary
+
+        self.segment_counts = collections.Counter()
+        self.ngram_counts = collections.Counter()
+        self.cluster_counts = collections.Counter()
+
+        self.num_strings = 0
+        self.num_words = 0
+
+        self.groups = {}
+
+    def __eq__(self, other):
+        if not isinstance(other, SegmentCounter):
+            return NotImplemented
+
+        return self.get_settings() == other.get_settings() and all(
+            getattr(self, key) == getattr(other, key)
+            for key in [
+                'segment_counts',
+                'ngram_counts',
+                'cluster_counts',
+                'num_strings',
+                'num_words',
+                'groups',
+            ]
+        )
+
+    def __iadd__(self, other):
+        """
+        Add the counts of the other counter, including those of its groups.
+        Raise ValueError if the counters' settings differ.
+        """
+        if not isinstance(other, SegmentCounter):
+            return NotImplemented
+
+        if self.get_settings() != other.get_settings():
+            raise ValueError('Cannot add counters with different settings')
+
+        self.segment_counts.update(other.segment_counts)
+        self.ngram_counts.update(other.ngram_counts)
+        self.cluster_counts.update(other.cluster_counts)
+
+        self.num_strings += other.num_strings
+        self.num_words += other.num_words
+
+        for group, counter in other.groups.items():
+            group_counter = self.get_group(group)
+            group_counter += counter
+
+        return self
+
+    def __add__(self, other):
+        if not isinstance(other, SegmentCounter):
+            return NotImplemented
+
+        counter = SegmentCounter(*self.get_settings())
+        counter += self
+        counter += other
+
+        return counter
+
+    def get_settings(self):
+        """
+        Return the (n, clusters, boundary) tuple of the counter's settings.
+        """
+        return self.n, self.clusters, self.boundary
+
+    def get_group(self, group):
+        """
+        Return the counter of the given group, creating it if needed. Group
+        counters have the same settings but no groups of their own.
+        """
+        if group not in self.groups:
+            self.groups[group] = SegmentCounter(*self.get_settings())
+
+        return self.groups[group]
+
+    def get_inventory(self, min_count=1):
+        """
+        Return the list of segments that occur at least min_count times, the
+        most frequent first.
+        """
+        return [
+            segment
+            for segment, count in self.segment_counts.most_common()
+            if count >= min_count
+        ]
+
+    def update(
+        self,
+        strings,
+        tokeniser=None,
+        group=None,
+        batch_size=10000,
+        workers=None,
+        backend=tokens.PROCESS,
+    ):
+        """
+        Count the segments, n-grams and clusters of the IPA strings of the
+        given iterable, adding them to the totals and, if group is not None,
+        to the counts of that group. Raise ValueError if there is a problem.
+
+        The tokeniser defaults to compile(), i.e. the default options of
+        tokenise. The strings are read in batches of batch_size; within a
+        batch, each distinct word is only tokenised once and no token lists
+        are kept for the repeated ones. If workers is greater than one, the
+        batches are counted by that many processes or, if backend is THREAD,
+        threads.
+        """
+        if tokeniser is None:
+            tokeniser = tokens.compile()
+
+        if batch_size < 1:
+            raise ValueError('batch_size should be a positive integer')
+
+        batches = make_batches(strings, batch_size)
+
+        if workers is not None and workers > 1:
+            counters = self.count_in_parallel(
+                tokeniser, batches, workers, backend
+            )
+        else:
+            counters = (
+                self.count_batch(tokeniser, batch) for batch in batches
+            )
+
+        for counter in counters:
+            self += counter
+
+            if group is not None:
+                group_counter = self.get_group(group)
+                group_counter += counter
+
+    def update_grouped(self, pairs, tokeniser=None, batch_size=10000):
+        """
+        Like update(strings, ..) but for an iterable of (group, string) pairs,
+        e.g. the (language, form) columns of a lexicon, in any order.
+        """
+        if tokeniser is None:
+            tokeniser = tokens.compile()
+
+        if batch_size < 1:
+            raise ValueError('batch_size should be a positive integer')
+
+        for batch in make_batches(pairs, batch_size):
+            grouped = collections.defaultdict(list)
+
+            for group, string in batch:
+                grouped[group].append(string)
+
+            for group, strings in grouped.items():
+                counter = self.count_batch(tokeniser, strings)
+
+                self += counter
+                group_counter = self.get_group(group)
+                group_counter += counter
+
+    def count_batch(self, tokeniser, strings):
+        """
+        Return a new counter, with the same settings, of the given strings.
+
+        Helper for update(strings, ..) and update_grouped(pairs, ..).
+        """
+        counter = SegmentCounter(*self.get_settings())
+        string_counts = collections.Counter(strings)
+
+        word_counts = collections.Counter()
+
+        for string, count in string_counts.items():
+            for word in string.split():
+                word_counts[word] += count
+
+        word_tokens = {
+            word: tokeniser.process_word(word) for word in word_counts
+        }
+
+        counter.count_words(word_counts, word_tokens)
+
+        if self.clusters:
+            counter.count_clusters(string_counts, word_tokens, tokeniser)
+
+        counter.num_strings = sum(string_counts.values())
+        counter.num_words = sum(word_counts.values())
+
+        return counter
+
+    def count_words(self, word_counts, word_tokens):
+        """
+        Add the segments and n-grams of the words, given the number of times
+        each occurs and the tokens of each.
+
+        Helper for count_batch(tokeniser, strings).
+        """
+        segment_counts = self.segment_counts
+        ngram_counts = self.ngram_counts
+        n = self.n
+
+        for word, count in word_counts.items():
+            segments = word_tokens[word]
+
+            for segment in segments:
+                segment_counts[segment] += count
+
+            if n == 1:
+                continue
+
+            if self.boundary is not None:
+                segments = [self.boundary, *segments, self.boundary]
+
+            for length in range(2, n + 1):
+                for index in range(len(segments) - length + 1):
+                    ngram = tuple(segments[index : index + length])
+                    ngram_counts[ngram] += count
+
+    def count_clusters(self, string_counts, word_tokens, tokeniser):
+        """
+        Add the clusters of the strings, given the number of times each occurs
+        and the tokens of each of their words. As with clusterise, clusters
+        can span word boundaries.
+
+        Helper for count_batch(tokeniser, strings).
+        """
+        token_classes = tokeniser.token_classes
+        cluster_counts = self.cluster_counts
+
+        for string, count in string_counts.items():
+            cluster = ''
+            prev_is_vowel = None
+
+            for word in string.split():
+                for token in word_tokens[word]:
+                    is_vowel = token_classes[token] == tokens.VOWEL
+
+                    if is_vowel == prev_is_vowel:
+                        cluster += token
+                    else:
+                        if cluster:
+                            cluster_counts[cluster] += count
+
+                        cluster = token
+                        prev_is_vowel = is_vowel
+
+            if cluster:
+                cluster_counts[cluster] += count
+
+    def count_in_parallel(self, tokeniser, batches, workers, backend):
+        """
+        Generate the counters of the batches, as counted by a pool of worker
+        processes or threads. At most two batches per worker are submitted at
+        a time, so that the input is not read all at once.
+
+        Helper for update(strings, ..).
+        """
+        if backend not in (tokens.PROCESS, tokens.THREAD):
+            raise ValueError(f'Unknown backend: {backend}')
+
+        if backend == tokens.THREAD:
+            func = functools.partial(self.count_batch, tokeniser)
+        else:
+            func = functools.partial(count_in_worker, self.get_settings())
+
+        with tokeniser.make_pool(workers, backend) as executor:
+            pending = collections.deque()
+
+            for batch in batches:
+                pending.append(executor.submit(func, batch))
+
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+
+def count_in_worker(settings, strings):
+    """
+    Return the counter with the given settings of the strings, as counted by
+    the worker's tokeniser.
+
+    Helper for SegmentCounter.count_in_parallel(..).
+    """
+    counter = SegmentCounter(*settings)
+    return counter.count_batch(tokens.worker_tokeniser, strings)
+
+
+def make_batches(items, batch_size):
+    """
+    Generate lists of up to batch_size consecutive items of the iterable.
+
+    Helper for SegmentCounter.update(strings, ..).
+    """
+    items = iter(items)
+
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+
+        if not batch:
+            break
+
+        yield batch
@@ -0,0 +1,255 @@
+import bisect
+import unicodedata
+
+from ipatok import tokens
+
+
+class IncrementalTokeniser:
+    """
+    Holds an IPA string together with its tokens and keeps the latter up to
+    date as the string is edited, re-tokenising only what an edit can affect:
+    the words it touches and, within a word, the tokens around the edit.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(
+        self,
+        string='',
+        strict=False,
+        replace=False,
+        diphthongs=False,
+        tones=False,
+        unknown=False,
+        merge=None,
+        chart=None,
+    ):
+        """
+        Tokenise the initial string. The keyword arguments are the same as
+        those of tokenise. Raise ValueError if the string cannot be tokenised.
+        """
+        self.tokeniser = tokens.compile(
+            strict, replace, diphthongs, tones, unknown, merge, chart=chart
+        )
+
+        # grouping diphthongs or using a merge function can join any two
+        # adjacent tokens, so in these cases whole words are re-tokenised
+        self.within_words = not diphthongs and merge is None
+
+        if replace and self.tokeniser.chart.replacements:
+            self.context = max(map(len, self.tokeniser.chart.replacements))
+        else:
+            self.context = 1
+
+        self.string = ''
+
+        # the words of the string: their start and end offsets and, for each,
+        # the list of its tokens and the list of their (start, end) spans
+        # relative to the word
+        self.starts = []
+        self.ends = []
+        self.word_tokens = []
+        self.word_spans = []
+
+        self.flat_tokens = []
+
+        self.replace(0, 0, string)
+
+    def __len__(self):
+        return len(self.string)
+
+    def __str__(self):
+        return self.string
+
+    @property
+    def tokens(self):
+        """
+        The list of tokens of the current string, as tokenise would return
+        it. The list should not be modified.
+        """
+        if self.flat_tokens is None:
+            self.flat_tokens = [
+                token for word in self.word_tokens for token in word
+            ]
+
+        return self.flat_tokens
+
+    def spans(self):
+        """
+        Return the list of (token, start, end) tuples of the current string,
+        as tokenise_spans would return it.
+        """
+        return [
+            (token, word_start + start, word_start + end)
+            for word_start, word_tokens, word_spans in zip(
+                self.starts, self.word_tokens, self.word_spans
+            )
+            for token, (start, end) in zip(word_tokens, word_spans)
+        ]
+
+    def insert(self, offset, text):
+        """
+        Insert the text at the given offset of the string. Raise ValueError if
+        the offset is out of range or if the new string cannot be tokenised;
+        in the latter case the string is left as it was.
+        """
+        self.replace(offset, offset, text)
+
+    def delete(self, offset, length):
+        """
+        Delete length characters from the given offset of the string. Raise
+        ValueError as insert(offset, text) does.
+        """
+        self.replace(offset, offset + length, '')
+
+    def replace(self, start, end, text):
+        """
+        Replace string[start:end] with the given text. Raise ValueError if the
+        range is invalid or if the new string cannot be tokenised; in the
+        latter case the string is left as it was.
+        """
+        if not 0 <= start <= end <= len(self.string):
+            raise ValueError(
+                f'Invalid range for a string of length {len(self.string)}: '
+                f'{start}:{end}'
+            )
+
+        string = self.string[:start] + text + self.string[end:]
+        delta = len(text) - (end - start)
+
+        # the words that overlap or touch the edited range
+        lo = bisect.bisect_left(self.ends, start)
+        hi = bisect.bisect_right(self.starts, end)
+
+        region_start = min(start, self.starts[lo]) if lo < hi else start
+        region_end = max(end, self.ends[hi - 1]) if lo < hi else end
+        region_end += delta
+
+        starts = []
+        ends = []
+        word_tokens = []
+        word_spans = []
+
+        matches = list(
+            tokens.get_word_re().finditer(string, region_start, region_end)
+        )
+
+        for match in matches:
+            if hi - lo == 1 and len(matches) == 1 and self.within_words:
+                output = self.retokenise_word(lo, match, start, end)
+            else:
+                output = self.tokenise_word(match.group())
+
+            starts.append(match.start())
+            ends.append(match.end())
+            word_tokens.append(output[0])
+            word_spans.append(output[1])
+
+        self.starts[lo:hi] = starts
+        self.ends[lo:hi] = ends
+        self.word_tokens[lo:hi] = word_tokens
+        self.word_spans[lo:hi] = word_spans
+
+        if delta:
+            index = lo + len(starts)
+            self.starts[index:] = [x + delta for x in self.starts[index:]]
+            self.ends[index:] = [x + delta for x in self.ends[index:]]
+
+        self.string = string
+        self.flat_tokens = None
+
+    def tokenise_word(self, word):
+        """
+        Return the (tokens, spans) tuple of the given word, the spans being
+        relative to it. Raise ValueError if the word cannot be tokenised.
+
+        Helper for replace(start, end, text).
+        """
+        output = self.tokeniser.tokenise_word_spans(word)
+        return [x[0] for x in output], [x[1:] for x in output]
+
+    def retokenise_word(self, index, match, start, end):
+        """
+        Return the (tokens, spans) tuple of the edited version of the word at
+        the given index, given the new word's match and the edited range of
+        the old string. Re-tokenise only the part of the word between the
+        token boundaries closest to the edit that it cannot affect.
+
+        Helper for replace(start, end, text).
+        """
+        word = match.group()
+        old_word = self.string[self.starts[index] : self.ends[index]]
+        old_tokens = self.word_tokens[index]
+        old_spans = self.word_spans[index]
+
+        # the lengths of the unchanged prefix and suffix of the word
+        prefix = max(0, start - self.starts[index])
+        suffix = max(0, self.ends[index] - end)
+
+        if match.start() != self.starts[index] or not old_tokens:
+            return self.tokenise_word(word)
+
+        num_tokens = len(old_tokens)
+
+        # [left, right) are the tokens to re-tokenise: those that overlap the
+        # edited part, plus one on each side
+        left = bisect.bisect_right([x[1] for x in old_spans], prefix)
+        left = max(0, left - 1)
+
+        right = bisect.bisect_left(
+            [x[0] for x in old_spans], len(old_word) - suffix
+        )
+        right = min(num_tokens, right + 1)
+
+        while left > 0 and not self.is_boundary(
+            old_word, old_spans, left, old_spans[left][0], prefix
+        ):
+            left -= 1
+
+        while right < num_tokens and not self.is_boundary(
+            old_word,
+            old_spans,
+            right,
+            len(old_word) - suffix,
+            old_spans[right - 1][1],
+        ):
+            right += 1
+
+        old_start = old_spans[left][0] if left > 0 else 0
+        old_end = (
+            old_spans[right - 1][1] if right < num_tokens else len(old_word)
+        )
+
+        shift = len(word) - len(old_word)
+        region = word[old_start : old_end + shift]
+
+        if region:
+            new_tokens, new_spans = self.tokenise_word(region)
+        else:
+            new_tokens, new_spans = [], []
+
+        return (
+            old_tokens[:left] + new_tokens + old_tokens[right:],
+            old_spans[:left]
+            + [(x + old_start, y + old_start) for x, y in new_spans]
+            + [(x + shift, y + shift) for x, y in old_spans[right:]],
+        )
+
+    def is_boundary(self, word, spans, index, start, end):
+        """
+        Check whether the boundary between the token at the given index and
+        the previous one cannot be shifted by an edit, given the unchanged
+        word[start:end] that separates the two. The tokens' spans should not
+        overlap, the token should start with a non-combining character, and
+        word[start:end] should include one such as well (so that combining
+        characters are not reordered across it) and be long enough for
+        substitutes not to reach across.
+
+        Helper for retokenise_word(..).
+        """
+        return (
+            end - start >= self.context
+            and spans[index - 1][1] <= spans[index][0]
+            and not unicodedata.combining(word[spans[index][0]])
+            and not all(map(unicodedata.combining, word[start:end]))
+        )
@@ -1,5 +1,8 @@
+import _thread
 import functools
+import os
 import os.path
+import types
 import unicodedata
 
 
@@ -12,17 +15,63 @@ IPA_CHART_PATH = os.path.join(DATA_DIR, 'ipa_2015.tsv')
 REPLACEMENTS_PATH = os.path.join(DATA_DIR, 'replacements.tsv')
 
 
+"""
+Bump this whenever the Chart's attributes change, so that pickled charts
+created by earlier versions are not used.
+"""
+PICKLE_VERSION = 2
+
+
+"""
+Bit flags comprising the values of the Chart's classification tables. The
+flags of a character combine the answers of the is_ functions below.
+"""
+LETTER = 1
+VOWEL = 2
+TIE_BAR = 4
+DIACRITIC = 8
+LENGTH = 16
+TONE = 32
+SUPRASEGMENTAL = 64
+
+
+class Table(dict):
+    """
+    Dict mapping characters to their classification flags, either in strict or
+    in non-strict mode. A character is classified on its first lookup and the
+    result is stored, so that further lookups amount to a single dict access.
+    """
+
+    def __init__(self, chart, strict):
+        super().__init__()
+        self.chart = chart
+        self.strict = strict
+
+    def __missing__(self, char):
+        flags = self[char] = self.chart.classify(char, self.strict)
+        return flags
+
+
 class Chart:
     """
-    Object that loads and stores the valid IPA symbols.
+    Object that loads and stores the valid IPA symbols. Besides the default
+    chart, which is loaded on first use, there can be any number of charts
+    loaded from custom files with load_chart(..), each with its own tables.
+
+    Charts returned by load_chart(..) are frozen: their symbol sets and dicts
+    cannot be modified, so they can be shared between threads. The only state
+    that changes afterwards are the entries that the classification tables
+    add on demand; these are deterministic, so threads that race to add the
+    same entry add the same value.
     """
 
     def __init__(self):
         """
-        Init the instance's properties. All of these but the last one are
+        Init the instance's properties. The first group of these are
         character sets, as needed by the is_ functions that comprise the
-        module's api. The last one is a dict mapping common substitutes to
-        their respective IPA counterparts.
+        module's api. The replacements dict maps common substitutes to their
+        respective IPA counterparts. The precomposed dict maps the normal form
+        D of the letters that are defined in normal form C to the latter.
         """
         self.consonants = set()
         self.vowels = set()
@@ -33,11 +82,84 @@ class Chart:
         self.tones = set()
 
         self.replacements = {}
+        self.replacements_re = None
+
+        self.precomposed = {}
+        self.precomposed_re = None
+
+        self.strict_table = Table(self, strict=True)
+        self.loose_table = Table(self, strict=False)
+
+        self.frozen = False
+
+    def __getstate__(self):
+        """
+        Return the chart's attributes for pickling; mapping proxies cannot be
+        pickled, so these are turned into dicts.
+        """
+        state = self.__dict__.copy()
+
+        for key in ['replacements', 'precomposed']:
+            state[key] = dict(state[key])
+
+        # compiled on demand, so that unpickling does not import re
+        state['replacements_re'] = None
+        state['precomposed_re'] = None
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the pickled attributes, freezing the chart again if it was
+        frozen when pickled.
+        """
+        self.__dict__.update(state)
+
+        if self.frozen:
+            self.frozen = False
+            self.freeze()
+
+    def freeze(self):
+        """
+        Make the chart immutable: turn its sets into frozensets and its dicts
+        into read-only mapping proxies. Loading more symbols or replacements
+        into a frozen chart raises RuntimeError.
+        """
+        if self.frozen:
+            return
+
+        for key in [
+            'consonants',
+            'vowels',
+            'tie_bars',
+            'diacritics',
+            'suprasegmentals',
+            'lengths',
+            'tones',
+        ]:
+            setattr(self, key, frozenset(getattr(self, key)))
+
+        for key in ['replacements', 'precomposed']:
+            setattr(self, key, types.MappingProxyType(getattr(self, key)))
+
+        self.frozen = True
+
+    def ensure_not_frozen(self):
+        """
+        Raise RuntimeError if the chart is frozen.
+
+        Helper for the load_ methods.
+        """
+        if self.frozen:
+            raise RuntimeError('The chart is frozen and cannot be modified')
 
     def load_ipa(self, file_path):
         """
         Populate the instance's set properties using the specified file.
+        Raise RuntimeError if the chart is frozen.
         """
+        self.ensure_not_frozen()
+
         sections = {
             '# consonants (pulmonic)': self.consonants,
             '# consonants (non-pulmonic)': self.consonants,
@@ -63,16 +185,201 @@ class Chart:
                     if curr_section is not None:
                         curr_section.add(line.split('\t')[0])
 
+        self.build_tables()
+
+        self.precomposed = {
+            unicodedata.normalize('NFD', letter): letter
+            for letter in self.consonants | self.vowels
+            if unicodedata.normalize('NFD', letter) != letter
+        }
+
+        self.precomposed_re = None
+
     def load_replacements(self, file_path):
         """
-        Populate self.replacements using the specified file.
+        Populate self.replacements using the specified file. Raise
+        RuntimeError if the chart is frozen.
         """
+        self.ensure_not_frozen()
+
         with open(file_path, encoding='utf-8') as f:
             for line in map(lambda x: x.strip(), f):
                 if line:
                     line = line.split('\t')
                     self.replacements[line[0]] = line[1]
 
+        self.replacements_re = None
+
+    def build_tables(self):
+        """
+        (Re-)populate the classification tables with the flags of all the
+        symbols in the chart. Other characters are classified on demand.
+        """
+        symbols = set().union(
+            self.consonants,
+            self.vowels,
+            self.tie_bars,
+            self.diacritics,
+            self.suprasegmentals,
+            self.lengths,
+            self.tones,
+        )
+
+        for table in [self.strict_table, self.loose_table]:
+            table.clear()
+            for char in symbols:
+                table[char] = self.classify(char, table.strict)
+
+    def recompose(self, string):
+        """
+        Return the given NFD string with the letters that are defined in
+        normal form C in the chart converted back to the latter.
+        """
+        precomposed_re = self.get_precomposed_re()
+
+        if precomposed_re is None:
+            return string
+
+        return precomposed_re.sub(self.recompose_match, string)
+
+    def recompose_match(self, match):
+        """
+        Return the precomposed counterpart of the matched decomposed letter.
+
+        Helper for recompose(string).
+        """
+        return self.precomposed[match.group()]
+
+    def replace_substitutes(self, string):
+        """
+        Return the given string with all the substitutes in the chart replaced
+        with their IPA-compliant counterparts. The string is scanned only once.
+        """
+        replacements_re = self.get_replacements_re()
+
+        if replacements_re is None:
+            return string
+
+        return replacements_re.sub(self.replace_match, string)
+
+    def replace_match(self, match):
+        """
+        Return the IPA counterpart of the matched substitute.
+
+        Helper for replace_substitutes(string).
+        """
+        return self.replacements[match.group()]
+
+    def get_precomposed_re(self):
+        """
+        Return the regex that finds the decomposed letters in self.precomposed,
+        compiling it on first use, or None if there are no such letters.
+        """
+        if self.precomposed_re is None and self.precomposed:
+            self.precomposed_re = compile_alternation(self.precomposed)
+
+        return self.precomposed_re
+
+    def get_replacements_re(self):
+        """
+        Return the regex that finds the substitutes in self.replacements,
+        compiling it on first use, or None if there are no substitutes.
+        """
+        if self.replacements_re is None and self.replacements:
+            self.replacements_re = compile_alternation(self.replacements)
+
+        return self.replacements_re
+
+    def get_table(self, strict=True):
+        """
+        Return the classification table for the given mode.
+        """
+        return self.strict_table if strict else self.loose_table
+
+    def get_digest(self):
+        """
+        Return a hex digest of the chart's symbols and replacements. Unlike the
+        fingerprint of the chart's files, it only changes if the contents of
+        the chart do, so it can be stored alongside tokenised output.
+        """
+        import hashlib
+        import json
+
+        data = [
+            sorted(getattr(self, key))
+            for key in [
+                'consonants',
+                'vowels',
+                'tie_bars',
+                'diacritics',
+                'suprasegmentals',
+                'lengths',
+                'tones',
+            ]
+        ]
+        data.append(sorted(self.replacements.items()))
+
+        return hashlib.sha256(json.dumps(data).encode('utf-8')).hexdigest()
+
+    def classify(self, char, strict=True):
+        """
+        Return the classification flags of the given character. In strict mode
+        only the symbols in the chart are recognised; otherwise the Unicode
+        category of the character is also taken into account.
+
+        Helper for Table; use the tables instead of calling this directly.
+        """
+        flags = 0
+
+        if char in self.consonants:
+            flags |= LETTER
+        elif char in self.vowels:
+            flags |= LETTER | VOWEL
+
+        if char in self.tie_bars:
+            flags |= TIE_BAR
+
+        if char in self.diacritics:
+            flags |= DIACRITIC
+
+        if char in self.lengths:
+            flags |= LENGTH | SUPRASEGMENTAL
+
+        if char in self.tones:
+            flags |= TONE | SUPRASEGMENTAL
+
+        if char in self.suprasegmentals:
+            flags |= SUPRASEGMENTAL
+
+        if not strict:
+            category = unicodedata.category(char)
+            modifier_tone = 0xA700 <= ord(char) <= 0xA71F
+
+            if category in ['Ll', 'Lo', 'Lt', 'Lu']:
+                flags |= LETTER
+
+            if modifier_tone:
+                flags |= TONE | SUPRASEGMENTAL
+
+            if category in ['Lm', 'Mn', 'Sk']:
+                if not flags & (SUPRASEGMENTAL | TIE_BAR):
+                    flags |= DIACRITIC
+
+        return flags
+
+
+def compile_alternation(strings):
+    """
+    Return a regex that matches any of the given strings; where these
+    overlap, the longest one wins.
+
+    Helper for the Chart's get_precomposed_re() and get_replacements_re().
+    """
+    import re
+
+    keys = sorted(strings, key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, keys)))
+
 
 def ensure_single_char(func):
     """
@@ -93,89 +400,79 @@ def ensure_single_char(func):
     return wrapper
 
 
+def get_flags(char, strict=True, chart=None):
+    """
+    Return the classification flags of the character in the given chart or,
+    if this is None, in the default chart.
+
+    Helper for the is_ functions.
+    """
+    if chart is None:
+        chart = get_chart()
+
+    return chart.get_table(strict)[char]
+
+
 @ensure_single_char
-def is_letter(char, strict=True):
+def is_letter(char, strict=True, chart=None):
     """
     Check whether the character is a letter (as opposed to a diacritic or
     suprasegmental).
 
     In strict mode return True only if the letter is part of the IPA spec.
     """
-    if (char in chart.consonants) or (char in chart.vowels):
-        return True
-
-    if not strict:
-        return unicodedata.category(char) in ['Ll', 'Lo', 'Lt', 'Lu']
-
-    return False
+    return bool(get_flags(char, strict, chart) & LETTER)
 
 
 @ensure_single_char
-def is_vowel(char):
+def is_vowel(char, chart=None):
     """
     Check whether the character is a vowel letter.
     """
-    if is_letter(char, strict=True):
-        return char in chart.vowels
-
-    return False
+    return bool(get_flags(char, True, chart) & VOWEL)
 
 
 @ensure_single_char
-def is_tie_bar(char):
+def is_tie_bar(char, chart=None):
     """
     Check whether the character is one of the two IPA tie bar symbols.
     """
-    return char in chart.tie_bars
+    return bool(get_flags(char, True, chart) & TIE_BAR)
 
 
 @ensure_single_char
-def is_diacritic(char, strict=True):
+def is_diacritic(char, strict=True, chart=None):
     """
     Check whether the character is a diacritic (as opposed to a letter or a
     suprasegmental).
 
     In strict mode return True only if the diacritic is part of the IPA spec.
     """
-    if char in chart.diacritics:
-        return True
-
-    if not strict:
-        return (
-            unicodedata.category(char) in ['Lm', 'Mn', 'Sk']
-            and not is_suprasegmental(char)
-            and not is_tie_bar(char)
-            and not 0xA700 <= ord(char) <= 0xA71F
-        )
-
-    return False
+    return bool(get_flags(char, strict, chart) & DIACRITIC)
 
 
 @ensure_single_char
-def is_suprasegmental(char, strict=True):
+def is_suprasegmental(char, strict=True, chart=None):
     """
     Check whether the character is a suprasegmental according to the IPA spec.
     This includes tones, word accents, and length markers.
 
     In strict mode return True only if the diacritic is part of the IPA spec.
     """
-    if (char in chart.suprasegmentals) or (char in chart.lengths):
-        return True
-
-    return is_tone(char, strict)
+    return bool(get_flags(char, strict, chart) & SUPRASEGMENTAL)
 
 
 @ensure_single_char
-def is_length(char):
+def is_length(char, chart=None):
     """
     Check whether the character is a length marker. Unlike other
     suprasegmentals, length markers are included in the tokenised output.
     """
-    return char in chart.lengths
+    return bool(get_flags(char, True, chart) & LENGTH)
 
 
 @ensure_single_char
-def is_tone(char, strict=True):
+def is_tone(char, strict=True, chart=None):
     """
     Check whether the character is a tone or word accent symbol. In strict mode
     return True only for the symbols listed in the last group of the chart. If
@@ -184,41 +481,171 @@ def is_tone(char, strict=True):
 
     [1]: http://www.unicode.org/charts/PDF/UA700.pdf
     """
-    if char in chart.tones:
-        return True
+    return bool(get_flags(char, strict, chart) & TONE)
 
-    if not strict:
-        return 0xA700 <= ord(char) <= 0xA71F
 
-    return False
-
-
-def get_precomposed_chars():
+def get_precomposed_chars(chart=None):
     """
     Return the set of IPA characters that are defined in normal form C in the
     spec. As of 2015, this is only the voiceless palatal fricative, ç.
     """
-    return set(
-        letter
-        for letter in chart.consonants
-        if unicodedata.normalize('NFD', letter) != letter
-    )
+    if chart is None:
+        chart = get_chart()
 
+    return set(chart.precomposed.values())
 
-def replace_substitutes(string):
+
+def replace_substitutes(string, chart=None):
     """
     Return the given string with all known common substitutes replaced with
-    their IPA-compliant counterparts.
+    their IPA-compliant counterparts. The string is scanned only once.
+    """
+    if chart is None:
+        chart = get_chart()
+
+    return chart.replace_substitutes(string)
+
+
+def get_fingerprint(*file_paths):
+    """
+    Return a tuple identifying the current state of the given files, so that
+    it changes whenever one of these is modified.
+
+    Helper for load_chart(..).
     """
-    for non_ipa, ipa in chart.replacements.items():
-        string = string.replace(non_ipa, ipa)
+    fingerprint = [PICKLE_VERSION]
 
-    return string
+    for file_path in filter(None, file_paths):
+        stat = os.stat(file_path)
+        fingerprint.append((file_path, stat.st_size, stat.st_mtime_ns))
+
+    return tuple(fingerprint)
+
+
+def load_chart(
+    ipa_path=IPA_CHART_PATH,
+    replacements_path=REPLACEMENTS_PATH,
+    pickle_path=None,
+):
+    """
+    Return a new frozen Chart loaded from the given files, e.g. a
+    project-specific inventory of symbols in the format of
+    ipatok/data/ipa_2015.tsv. If replacements_path is None, the chart has no
+    substitutes to replace.
+
+    If pickle_path is not None, use the chart pickled there, unless the files
+    have been modified since; in the latter case parse the files and try to
+    (re-)create the pickle, silently giving up if its directory is not
+    writable. Different charts should use different pickle paths.
+    """
+    if pickle_path is not None:
+        import pickle
+
+        fingerprint = get_fingerprint(ipa_path, replacements_path)
+
+        try:
+            with open(pickle_path, 'rb') as f:
+                pickled_fingerprint, chart = pickle.load(f)
+            if pickled_fingerprint == fingerprint:
+                return chart
+        except Exception:
+            pass
+
+    chart = Chart()
+    chart.load_ipa(ipa_path)
+
+    if replacements_path is not None:
+        chart.load_replacements(replacements_path)
+
+    chart.freeze()
+
+    if pickle_path is not None:
+        try:
+            dump_chart(chart, fingerprint, pickle_path)
+        except OSError:
+            pass
+
+    return chart
+
+
+def dump_chart(chart, fingerprint, pickle_path):
+    """
+    Pickle the chart together with its files' fingerprint.
+
+    Helper for load_chart(..).
+    """
+    import pickle
+
+    write_atomically(
+        pickle_path, lambda f: pickle.dump((fingerprint, chart), f)
+    )
+
+
+def write_atomically(file_path, write):
+    """
+    Call write with a binary file object to write the file at the given path.
+    The file is first written to a temporary file which then replaces the
+    target, so that other processes never read a half-written file. The
+    temporary file is created readable by its owner only, so it is given the
+    permissions of a file created with open(..) before it replaces the target.
+
+    Helper for dump_chart(..) and corpus.write_corpus(..).
+    """
+    import tempfile
+
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(os.path.abspath(file_path)), delete=False
+    ) as f:
+        temp_path = f.name
+
+        try:
+            write(f)
+        except Exception:
+            f.close()
+            os.remove(temp_path)
+            raise
+
+    # there is no way to read the umask without setting it
+    umask = os.umask(0)
+    os.umask(umask)
+
+    try:
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, file_path)
+    except OSError:
+        os.remove(temp_path)
+        raise
 
 
 """
-Load the chart.
+Guards the loading of the default chart. This is the lock that threading
+builds upon, so that importing ipatok does not involve importing the latter.
 """
-chart = Chart()
-chart.load_ipa(IPA_CHART_PATH)
-chart.load_replacements(REPLACEMENTS_PATH)
+chart_lock = _thread.allocate_lock()
+
+
+def get_chart():
+    """
+    Return the default chart, loading it on first use. The chart is also
+    available as the module's chart attribute. Parsing the data files is
+    faster than unpickling the chart, as importing pickle alone takes longer.
+    """
+    global chart
+
+    if 'chart' not in globals():
+        with chart_lock:
+            if 'chart' not in globals():
+                chart = load_chart()
+
+    return chart
+
+
+def __getattr__(name):
+    """
+    Load the default chart on first access to the module's chart attribute,
+    so that importing ipatok does not involve parsing the data files.
+    """
+    if name == 'chart':
+        return get_chart()
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,125 @@
+import contextlib
+import threading
+
+from ipatok import tokens
+
+
+"""
+The stages of tokenising that are timed, in the order in which they happen.
+"""
+STAGES = (
+    'tokenise',
+    'normalise',
+    'replace',
+    'classify',
+    'diphthongs',
+    'merge',
+)
+
+
+class Profile:
+    """
+    Per-stage call counts and cumulative times, plus word cache lookups and
+    misses, as recorded by tokenisers while the profile is active.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(self):
+        """
+        Init the counters; self.times are in nanoseconds.
+        """
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Set all the counters to zero.
+        """
+        with self.lock:
+            self.counts = dict.fromkeys(STAGES, 0)
+            self.times = dict.fromkeys(STAGES, 0)
+            self.words = 0
+            self.cache_lookups = 0
+            self.cache_misses = 0
+
+    def record(self, stage, elapsed):
+        """
+        Add a call to the given stage that took elapsed nanoseconds.
+        """
+        with self.lock:
+            self.counts[stage] += 1
+            self.times[stage] += elapsed
+
+    def record_words(self, words):
+        """
+        Add the given number of words.
+        """
+        with self.lock:
+            self.words += words
+
+    def record_lookup(self):
+        """
+        Add a word cache lookup.
+        """
+        with self.lock:
+            self.cache_lookups += 1
+
+    def record_miss(self):
+        """
+        Add a word cache miss.
+        """
+        with self.lock:
+            self.cache_misses += 1
+
+    def as_dict(self):
+        """
+        Return the stats as a dict of plain values, e.g. for logging or JSON.
+        Times are in seconds; stages that were not reached are omitted.
+        """
+        with self.lock:
+            stages = {
+                stage: {
+                    'count': self.counts[stage],
+                    'time': self.times[stage] / 1e9,
+                }
+                for stage in STAGES
+                if self.counts[stage]
+            }
+
+            hits = self.cache_lookups - self.cache_misses
+
+            return {
+                'stages': stages,
+                'words': self.words,
+                'cache': {
+                    'hits': hits,
+                    'misses': self.cache_misses,
+                    'hit_rate': (
+                        hits / self.cache_lookups
+                        if self.cache_lookups
+                        else None
+                    ),
+                },
+            }
+
+
+@contextlib.contextmanager
+def profile(stats=None):
+    """
+    Context manager that makes all tokenisers record their stats into the
+    given Profile, or into a new one, while the context is active. Yield the
+    profile. Only calls made in the same thread or asyncio task are profiled;
+    worker processes and the threads of pools are not.
+
+    Part of ipatok's public API.
+    """
+    if stats is None:
+        stats = Profile()
+
+    token = tokens.active_profile.set(stats)
+
+    try:
+        yield stats
+    finally:
+        tokens.active_profile.reset(token)
@@ -0,0 +1,109 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase
+
+from ipatok.aio import aclusterise_many, atokenise_many
+from ipatok.tokens import (
+    are_diphthong,
+    clusterise_many,
+    compile,
+    tokenise_many,
+)
+
+
+STRINGS = ['t͡saɪ̯çən', 'ut͡ʃa sɛ', 'moːɐ̯', '', 't͡saɪ̯çən', 'ʦa'] * 5
+
+
+async def stream(strings):
+    for string in strings:
+        await asyncio.sleep(0)
+        yield string
+
+
+class AioTestCase(IsolatedAsyncioTestCase):
+    async def test_atokenise_many(self):
+        output = [x async for x in atokenise_many(STRINGS, batch_size=4)]
+        self.assertEqual(output, tokenise_many(STRINGS))
+
+        output = [
+            x
+            async for x in atokenise_many(
+                stream(STRINGS), replace=True, merge=are_diphthong
+            )
+        ]
+        self.assertEqual(
+            output, tokenise_many(STRINGS, replace=True, merge=are_diphthong)
+        )
+
+    async def test_aclusterise_many(self):
+        with ThreadPoolExecutor(2) as executor:
+            output = [
+                x
+                async for x in aclusterise_many(
+                    stream(STRINGS),
+                    batch_size=1,
+                    max_pending=3,
+                    executor=executor,
+                )
+            ]
+        self.assertEqual(output, clusterise_many(STRINGS))
+
+    async def test_process_pool(self):
+        with compile(replace=True).make_pool(2) as executor:
+            output = [
+                x
+                async for x in atokenise_many(
+                    STRINGS, replace=True, batch_size=5, executor=executor
+                )
+            ]
+        self.assertEqual(output, tokenise_many(STRINGS, replace=True))
+
+        with ProcessPoolExecutor(2) as executor:
+            output = [
+                x
+                async for x in aclusterise_many(
+                    STRINGS,
+                    replace=True,
+                    merge=are_diphthong,
+                    batch_size=5,
+                    executor=executor,
+                )
+            ]
+
+            with self.assertRaises(ValueError):
+                async for _ in atokenise_many(
+                    STRINGS, merge=lambda a, b: False, executor=executor
+                ):
+                    pass
+
+        self.assertEqual(
+            output,
+            clusterise_many(STRINGS, replace=True, merge=are_diphthong),
+        )
+
+    async def test_backpressure(self):
+        """
+        No more than max_pending batches should be read ahead of the output.
+        """
+        consumed = []
+
+        async def counting_stream():
+            for string in STRINGS:
+                consumed.append(string)
+                yield string
+
+        outputs = atokenise_many(
+            counting_stream(), batch_size=2, max_pending=2
+        )
+        await anext(outputs)
+        self.assertEqual(len(consumed), 4)
+        await outputs.aclose()
+
+    async def test_errors(self):
+        with self.assertRaises(ValueError):
+            async for _ in atokenise_many(STRINGS, strict=True):
+                pass
+
+        with self.assertRaises(ValueError):
+            async for _ in atokenise_many(STRINGS, batch_size=0):
+                pass
@@ -0,0 +1,95 @@
+from unittest import TestCase, skipIf
+
+from ipatok.arrays import clusterise_array, tokenise_array
+from ipatok.tokens import clusterise, tokenise
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+STRINGS = ['ʦa', 'ˈtiːt͡ʃə', '', 'ʦa', 'ə̋ə̏', 'ʷəˈʁʷa']
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class NumpyTestCase(TestCase):
+    def test_tokenise_array(self):
+        values, offsets = tokenise_array(numpy.array(STRINGS), replace=True)
+
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(len(offsets), len(STRINGS) + 1)
+
+        for index, string in enumerate(STRINGS):
+            self.assertEqual(
+                values[offsets[index] : offsets[index + 1]].tolist(),
+                tokenise(string, replace=True),
+            )
+
+    def test_clusterise_array(self):
+        array = numpy.array(STRINGS, dtype=object).reshape(2, 3)
+        values, offsets = clusterise_array(array)
+
+        self.assertEqual(
+            [values[x:y].tolist() for x, y in zip(offsets, offsets[1:])],
+            [clusterise(string) for string in STRINGS],
+        )
+
+    def test_errors(self):
+        with self.assertRaises(TypeError):
+            tokenise_array(numpy.array([1, 2]))
+
+        with self.assertRaisesRegex(ValueError, 'None'):
+            tokenise_array(numpy.array(['ta', None], dtype=object))
+
+        with self.assertRaisesRegex(ValueError, '1'):
+            tokenise_array(numpy.array(['ta', 1], dtype=object))
+
+        with self.assertRaises(ValueError):
+            tokenise_array(numpy.array(['ʦa']), strict=True)
+
+
+@skipIf(pyarrow is None, 'pyarrow is not installed')
+class ArrowTestCase(TestCase):
+    def test_tokenise_array(self):
+        array = pyarrow.array(STRINGS + [None])
+        expected = [tokenise(string) for string in STRINGS] + [None]
+
+        output = tokenise_array(array)
+        self.assertEqual(
+            output.type, pyarrow.large_list(pyarrow.large_string())
+        )
+        self.assertEqual(output.to_pylist(), expected)
+
+        output = tokenise_array(array.cast(pyarrow.large_string()))
+        self.assertEqual(output.to_pylist(), expected)
+
+        output = tokenise_array(array.dictionary_encode())
+        self.assertEqual(output.to_pylist(), expected)
+
+        output = tokenise_array(pyarrow.chunked_array([array, array[:2]]))
+        self.assertIsInstance(output, pyarrow.ChunkedArray)
+        self.assertEqual(output.to_pylist(), expected + expected[:2])
+
+    def test_clusterise_array(self):
+        output = clusterise_array(pyarrow.array(STRINGS), replace=True)
+        self.assertEqual(
+            output.to_pylist(),
+            [clusterise(string, replace=True) for string in STRINGS],
+        )
+
+    def test_errors(self):
+        for array in [
+            pyarrow.array([1, 2]),
+            pyarrow.array([1, 2]).dictionary_encode(),
+        ]:
+            with self.assertRaises(TypeError):
+                tokenise_array(array)
+
+        with self.assertRaises(ValueError):
+            tokenise_array(pyarrow.array(['ʦa']), strict=True)
@@ -0,0 +1,29 @@
+import json
+from unittest import TestCase
+
+from ipatok.benchmarks import compare, make_corpus, run
+from ipatok.tokens import tokenise
+
+
+class BenchmarksTestCase(TestCase):
+    def test_make_corpus(self):
+        """
+        The synthetic corpora should be reproducible and strictly tokenisable.
+        """
+        corpus = make_corpus(200, seed=42)
+
+        self.assertEqual(len(corpus), 200)
+        self.assertEqual(corpus, make_corpus(200, seed=42))
+
+        for string in corpus:
+            self.assertTrue(tokenise(string, strict=True))
+
+    def test_run(self):
+        results = run(size=20, repeat=1, include_import=False)
+        results = json.loads(json.dumps(results))
+
+        self.assertEqual(results['meta']['size'], 20)
+        self.assertEqual(len(results['results']), 32 + 8)
+
+        for name, old_value, new_value, ratio in compare(results, results):
+            self.assertEqual(ratio, 1)
@@ -0,0 +1,90 @@
+import os.path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ipatok.cli import ERROR_MARK, main
+
+
+class CliTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.input_path = os.path.join(self.temp_dir.name, 'input')
+        self.output_path = os.path.join(self.temp_dir.name, 'output')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_main(self, input_text, *args):
+        """
+        Write the input file, run the cli with the given args and return the
+        contents of the output file.
+        """
+        with open(self.input_path, 'w', encoding='utf-8') as f:
+            f.write(input_text)
+
+        main([self.input_path, '-o', self.output_path] + list(args))
+
+        with open(self.output_path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_lines(self):
+        for args in [[], ['--workers', '2', '--chunk-size', '1']]:
+            self.assertEqual(
+                self.run_main('ˈtiːt͡ʃə\n\nut͡ʃa sɛ\n', *args),
+                't iː t͡ʃ ə\n\nu t͡ʃ a s ɛ\n',
+            )
+
+        self.assertEqual(
+            self.run_main('kiaːltaːʃ\nt͡saɪ̯çən\n', '--clusterise'),
+            'k iaː lt aː ʃ\nt͡s aɪ̯ ç ə n\n',
+        )
+        self.assertEqual(
+            self.run_main('t͡saɪ̯çən\n', '--diphthongs'),
+            't͡s aɪ̯ ç ə n\n',
+        )
+
+    def test_columns(self):
+        input_text = 'id\tform\n1\tˈtiːt͡ʃə\n2\n'
+
+        self.assertEqual(
+            self.run_main(input_text, '-f', 'tsv', '--header', '-c', 'form'),
+            'id\tform\n1\tt iː t͡ʃ ə\n2\t\n',
+        )
+        self.assertEqual(
+            self.run_main('x,t͡saɪ̯çən,y\n', '-f', 'csv', '-c', '2'),
+            'x,t͡s a ɪ̯ ç ə n,y\n',
+        )
+
+        with self.assertRaises(SystemExit):
+            self.run_main(input_text, '-f', 'tsv', '-c', 'form')
+
+        # quote chars are not special in tsv
+        self.assertEqual(
+            self.run_main('"a\tta\nc"\tʃa\na"b\tna\n', '-f', 'tsv', '-c', '2'),
+            '"a\tt a\nc"\tʃ a\na"b\tn a\n',
+        )
+
+    def test_errors(self):
+        input_text = 'prɤst\nʷəˈʁʷa\nna\n'
+
+        for args in [[], ['--workers', '2', '--chunk-size', '1']]:
+            self.assertEqual(
+                self.run_main(input_text, '--strict', '--errors=skip', *args),
+                'p r ɤ s t\nn a\n',
+            )
+            self.assertEqual(
+                self.run_main(input_text, '--strict', '--errors=mark', *args),
+                f'p r ɤ s t\n{ERROR_MARK}\nn a\n',
+            )
+
+            with self.assertRaises(SystemExit):
+                self.run_main(input_text, '--strict', *args)
+
+        self.assertEqual(
+            self.run_main(input_text, '--errors=skip'),
+            'p r ɤ s t\nʷ ə ʁʷ a\nn a\n',
+        )
+        self.assertEqual(
+            self.run_main('͡a\nna\n', '--errors=mark'),
+            f'{ERROR_MARK}\nn a\n',
+        )
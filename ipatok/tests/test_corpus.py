@@ -0,0 +1,261 @@
+import os
+import os.path
+import pickle
+import sys
+from array import array
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from ipatok import ipa
+from ipatok.benchmarks import make_corpus
+from ipatok.corpus import (
+    MappedCorpus,
+    TokenisedCorpus,
+    open_corpus,
+    write_corpus,
+)
+from ipatok.tokens import THREAD, are_diphthong, compile, tokenise_many
+
+
+class TokenisedCorpusTestCase(TestCase):
+    def test_from_strings(self):
+        strings = make_corpus(500, seed=4) + ['', 'ʦa']
+        expected = tokenise_many(strings, replace=True)
+
+        for batch_size in [1, 7, 1000]:
+            corpus = TokenisedCorpus.from_strings(
+                strings, compile(replace=True), batch_size=batch_size
+            )
+            self.assertEqual(len(corpus), len(strings))
+            self.assertEqual(list(corpus), expected)
+            self.assertEqual(corpus.num_tokens, sum(map(len, expected)))
+
+        corpus = TokenisedCorpus.from_strings(
+            iter(strings), compile(replace=True), workers=2, backend=THREAD
+        )
+        self.assertEqual(list(corpus), expected)
+
+        with self.assertRaises(ValueError):
+            TokenisedCorpus.from_strings(['ʦa'], compile(strict=True))
+
+        with self.assertRaises(ValueError):
+            TokenisedCorpus.from_strings(strings, batch_size=0)
+
+    def test_getitem(self):
+        token_lists = [['t', 'iː', 't͡ʃ', 'ə'], [], ['t', 'a'], ['ʃ', 'a']]
+        corpus = TokenisedCorpus.from_lists(token_lists)
+
+        self.assertEqual(corpus.chars, 'tiːt͡ʃətaʃa')
+        self.assertEqual(
+            list(corpus.token_offsets), [0, 1, 3, 6, 7, 8, 9, 10, 11]
+        )
+        self.assertEqual(list(corpus.offsets), [0, 4, 4, 6, 8])
+
+        for index in range(-4, 4):
+            self.assertEqual(corpus[index], token_lists[index])
+
+        for index in [4, -5]:
+            with self.assertRaises(IndexError):
+                corpus[index]
+
+        for index in [
+            slice(None),
+            slice(1, 3),
+            slice(2, None),
+            slice(3, 1),
+            slice(-3, -1),
+            slice(None, None, 2),
+            slice(None, None, -1),
+        ]:
+            self.assertEqual(list(corpus[index]), token_lists[index])
+            self.assertEqual(
+                corpus[index], TokenisedCorpus.from_lists(token_lists[index])
+            )
+
+        self.assertEqual(TokenisedCorpus(), TokenisedCorpus.from_lists([]))
+        self.assertEqual(len(TokenisedCorpus()), 0)
+
+    def test_invalid_offsets(self):
+        with self.assertRaises(ValueError):
+            TokenisedCorpus('ta', array('Q', [0, 1]), array('Q', [0, 1]))
+
+        with self.assertRaises(ValueError):
+            TokenisedCorpus('ta', array('Q', [0, 1, 2]), array('Q', [0, 1]))
+
+    def test_memory(self):
+        """
+        The corpus should take less than half the memory of the token lists.
+        """
+        corpus = TokenisedCorpus.from_strings(make_corpus(500, seed=5))
+        token_lists = list(corpus)
+
+        self.assertLess(
+            corpus.nbytes * 2,
+            sys.getsizeof(token_lists)
+            + sum(
+                sys.getsizeof(tokens) + sum(map(sys.getsizeof, tokens))
+                for tokens in token_lists
+            ),
+        )
+        self.assertEqual(pickle.loads(pickle.dumps(corpus)), corpus)
+
+
+class MappedCorpusTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'corpus.bin')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_and_open(self):
+        strings = make_corpus(300, seed=6) + ['', 'ʦa']
+        expected = tokenise_many(strings, replace=True)
+
+        write_corpus(self.file_path, iter(strings), compile(replace=True))
+
+        # the file should have the permissions of other new files
+        with open(os.path.join(self.temp_dir.name, 'other'), 'wb') as f:
+            self.assertEqual(
+                os.stat(self.file_path).st_mode, os.stat(f.fileno()).st_mode
+            )
+        os.remove(f.name)
+
+        with MappedCorpus(self.file_path) as corpus:
+            self.assertEqual(len(corpus), len(strings))
+            self.assertEqual(list(corpus), expected)
+            self.assertEqual(corpus[-1], ['t͡s', 'a'])
+            self.assertEqual(corpus[2:5], expected[2:5])
+            self.assertEqual(corpus.num_tokens, sum(map(len, expected)))
+            self.assertEqual(
+                corpus.vocabulary.decode(corpus.get_ids(0)), expected[0]
+            )
+            self.assertTrue(corpus.header['options']['replace'])
+
+            with self.assertRaises(IndexError):
+                corpus[len(strings)]
+
+            ids = corpus.get_ids(0)
+
+        # the views returned by get_ids(..) outlive the corpus
+        self.assertEqual(corpus.vocabulary.decode(ids), expected[0])
+
+        with open_corpus(self.file_path) as corpus:
+            self.assertEqual(list(corpus), expected)
+
+        write_corpus(self.file_path, [])
+
+        with open_corpus(self.file_path) as corpus:
+            self.assertEqual(len(corpus), 0)
+            self.assertEqual(list(corpus), [])
+
+    def test_invalid_file(self):
+        with self.assertRaises(OSError):
+            open_corpus(self.file_path)
+
+        with open(self.file_path, 'wb') as f:
+            f.write(b'IPATOK')
+
+        with self.assertRaises(ValueError):
+            open_corpus(self.file_path)
+
+        write_corpus(self.file_path, ['ta'])
+
+        with open(self.file_path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.file_path) - 8)
+
+        with self.assertRaises(ValueError):
+            open_corpus(self.file_path)
+
+        with self.assertRaises(ValueError):
+            write_corpus(self.file_path, ['ʦa'], compile(strict=True))
+
+        self.assertEqual(os.listdir(self.temp_dir.name), ['corpus.bin'])
+
+    def test_up_to_date(self):
+        """
+        The file should be re-written if and only if the strings, the options
+        or the chart change.
+        """
+        strings = make_corpus(50, seed=7)
+
+        def is_rewritten(strings, tokeniser=compile()):
+            """
+            Open the corpus, check its contents and return whether the file
+            was re-written in the process.
+            """
+            if os.path.exists(self.file_path):
+                os.utime(self.file_path, ns=(0, 0))
+
+            with open_corpus(self.file_path, strings, tokeniser) as corpus:
+                self.assertEqual(
+                    list(corpus), tokeniser.tokenise_many(strings)
+                )
+
+            return os.stat(self.file_path).st_mtime_ns != 0
+
+        self.assertTrue(is_rewritten(strings))
+        self.assertFalse(is_rewritten(strings))
+        self.assertFalse(is_rewritten(strings, compile(cache_size=10)))
+
+        self.assertTrue(is_rewritten(strings[:-1]))
+        self.assertTrue(is_rewritten(strings))
+        self.assertTrue(is_rewritten(strings, compile(tones=True)))
+        self.assertTrue(is_rewritten(strings))
+
+        # iterators can only be read once but are read twice
+        with open_corpus(self.file_path, iter(strings[:-1])) as corpus:
+            self.assertEqual(list(corpus), tokenise_many(strings[:-1]))
+
+        with open_corpus(self.file_path, (x for x in strings[:-1])) as corpus:
+            self.assertEqual(list(corpus), tokenise_many(strings[:-1]))
+
+        self.assertTrue(is_rewritten(strings))
+
+        chart = ipa.load_chart()
+        self.assertEqual(chart.get_digest(), ipa.get_chart().get_digest())
+        self.assertFalse(is_rewritten(strings, compile(chart=chart)))
+
+        with TemporaryDirectory() as temp_dir:
+            ipa_path = os.path.join(temp_dir, 'ipa.tsv')
+
+            with open(ipa_path, 'w', encoding='utf-8') as f:
+                f.write('# consonants (pulmonic)\nt\n# vowels\na\n')
+
+            chart = ipa.load_chart(ipa_path)
+
+        self.assertNotEqual(chart.get_digest(), ipa.get_chart().get_digest())
+        self.assertTrue(is_rewritten(strings, compile(chart=chart)))
+
+    def test_up_to_date_merge(self):
+        """
+        Files written with merge functions that cannot be told apart by name
+        should always be re-written; so should files written by a different
+        version of ipatok.
+        """
+        strings = make_corpus(20, seed=8)
+
+        def is_rewritten(tokeniser):
+            if os.path.exists(self.file_path):
+                os.utime(self.file_path, ns=(0, 0))
+
+            open_corpus(self.file_path, strings, tokeniser).close()
+
+            return os.stat(self.file_path).st_mtime_ns != 0
+
+        tokeniser = compile(merge=are_diphthong)
+        self.assertTrue(is_rewritten(tokeniser))
+        self.assertFalse(is_rewritten(tokeniser))
+
+        with patch('ipatok.corpus.__version__', '0.0.0'):
+            self.assertTrue(is_rewritten(tokeniser))
+
+        self.assertTrue(is_rewritten(tokeniser))
+
+        tokeniser = compile(merge=lambda a, b: False)
+        self.assertTrue(is_rewritten(tokeniser))
+        self.assertTrue(is_rewritten(tokeniser))
+
+        self.assertTrue(is_rewritten(compile()))
+        self.assertFalse(is_rewritten(compile()))
@@ -0,0 +1,125 @@
+import pickle
+from collections import Counter
+from unittest import TestCase
+
+from ipatok.benchmarks import make_corpus
+from ipatok.counts import SegmentCounter
+from ipatok.tokens import THREAD, clusterise, compile, tokenise
+
+
+class SegmentCounterTestCase(TestCase):
+    def setUp(self):
+        self.strings = make_corpus(500, seed=8, substitutes=True) + ['a ta']
+
+    def test_update(self):
+        """
+        The counts should match those of Counter objects over the output of
+        tokenise and clusterise.
+        """
+        segments = Counter()
+        ngrams = Counter()
+        clusters = Counter()
+
+        for string in self.strings:
+            segments.update(tokenise(string, replace=True))
+            clusters.update(clusterise(string, replace=True))
+
+            for word in string.split():
+                tokens = ['#'] + tokenise(word, replace=True) + ['#']
+                ngrams.update(zip(tokens, tokens[1:]))
+                ngrams.update(zip(tokens, tokens[1:], tokens[2:]))
+
+        for batch_size in [1, 64, 10000]:
+            counter = SegmentCounter(n=3, boundary='#')
+            counter.update(
+                iter(self.strings),
+                compile(replace=True),
+                batch_size=batch_size,
+            )
+
+            self.assertEqual(counter.segment_counts, segments)
+            self.assertEqual(counter.ngram_counts, ngrams)
+            self.assertEqual(counter.cluster_counts, clusters)
+            self.assertEqual(counter.num_strings, len(self.strings))
+            self.assertEqual(
+                counter.num_words, sum(len(x.split()) for x in self.strings)
+            )
+
+        inventory = counter.get_inventory()
+        self.assertEqual(set(inventory), set(segments))
+        self.assertEqual(
+            [segments[segment] for segment in inventory],
+            sorted(segments.values(), reverse=True),
+        )
+        self.assertEqual(
+            set(counter.get_inventory(min_count=10)),
+            {segment for segment, count in segments.items() if count >= 10},
+        )
+
+        counter = SegmentCounter(n=1, clusters=False)
+        counter.update(self.strings)
+        self.assertEqual(counter.ngram_counts, Counter())
+        self.assertEqual(counter.cluster_counts, Counter())
+
+        with self.assertRaises(ValueError):
+            counter.update(['ʦa'], compile(strict=True))
+
+        with self.assertRaises(ValueError):
+            SegmentCounter(n=0)
+
+    def test_groups(self):
+        counter = SegmentCounter()
+        counter.update(self.strings[:200], group='a')
+        counter.update(self.strings[200:], group='b')
+
+        other = SegmentCounter()
+        other.update_grouped(
+            [('a', string) for string in self.strings[:200]]
+            + [('b', string) for string in self.strings[200:]],
+            batch_size=50,
+        )
+        self.assertEqual(other, counter)
+
+        total = SegmentCounter()
+        total.update(self.strings)
+
+        self.assertEqual(counter.segment_counts, total.segment_counts)
+        self.assertEqual(
+            counter.groups['a'].segment_counts
+            + counter.groups['b'].segment_counts,
+            total.segment_counts,
+        )
+        self.assertEqual(counter.groups['a'].num_strings, 200)
+
+    def test_merge(self):
+        """
+        Counters should add up to the counter of all the strings, also across
+        processes.
+        """
+        total = SegmentCounter()
+        total.update(self.strings, group='x')
+
+        first = SegmentCounter()
+        first.update(self.strings[:100], group='x')
+        second = pickle.loads(pickle.dumps(SegmentCounter()))
+        second.update(self.strings[100:], group='x')
+
+        self.assertEqual(first + second, total)
+        self.assertNotEqual(first, total)
+
+        first += second
+        self.assertEqual(first, total)
+
+        with self.assertRaises(ValueError):
+            first += SegmentCounter(n=3)
+
+        for backend in ['process', THREAD]:
+            counter = SegmentCounter()
+            counter.update(
+                self.strings,
+                group='x',
+                batch_size=30,
+                workers=2,
+                backend=backend,
+            )
+            self.assertEqual(counter, total)
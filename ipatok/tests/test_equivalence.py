@@ -0,0 +1,73 @@
+from unittest import TestCase, skipIf
+
+from ipatok.benchmarks import ENGINES
+from ipatok.benchmarks.equivalence import (
+    find_mismatches,
+    get_symbols,
+    make_fuzz_corpus,
+)
+
+try:
+    import hypothesis
+    from hypothesis import strategies
+except ImportError:
+    hypothesis = None
+
+
+def merge_stops(tokenA, tokenB):
+    """
+    Merge function that groups consecutive stops, for checking that merge is
+    applied in the same way as by the reference.
+    """
+    return tokenA[-1] in 'ptk' and tokenB[0] in 'ptk'
+
+
+class EquivalenceTestCase(TestCase):
+    def test_make_fuzz_corpus(self):
+        corpus = make_fuzz_corpus(100, seed=3)
+
+        self.assertEqual(len(corpus), 100)
+        self.assertEqual(corpus, make_fuzz_corpus(100, seed=3))
+        self.assertTrue(all(len(string) <= 12 for string in corpus))
+
+    def test_engines(self):
+        """
+        Each engine should yield the same tokens, clusters and errors as the
+        reference implementation, regardless of the flag values.
+        """
+        strings = make_fuzz_corpus(300, seed=1)
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(find_mismatches(engine, strings), [])
+
+    def test_engines_with_merge(self):
+        strings = make_fuzz_corpus(100, seed=2)
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(
+                    find_mismatches(engine, strings, merge=merge_stops), []
+                )
+
+
+@skipIf(hypothesis is None, 'Hypothesis is not installed')
+class HypothesisTestCase(TestCase):
+    def test_engines(self):
+        """
+        Like EquivalenceTestCase.test_engines but with strings that are
+        generated, and shrunk on failure, by Hypothesis.
+        """
+        symbols = strategies.sampled_from(
+            [symbol for group in get_symbols() for symbol in group]
+        )
+
+        @hypothesis.given(
+            strategies.lists(symbols, max_size=12).map(''.join),
+            strategies.sampled_from(sorted(ENGINES)),
+        )
+        @hypothesis.settings(max_examples=200, deadline=None)
+        def check(string, engine):
+            self.assertEqual(find_mismatches(engine, [string]), [])
+
+        check()
@@ -0,0 +1,93 @@
+import random
+from unittest import TestCase
+
+from ipatok.incremental import IncrementalTokeniser
+from ipatok.tokens import are_diphthong, tokenise, tokenise_spans
+
+
+class IncrementalTestCase(TestCase):
+    def assertTokens(self, tokeniser, **kwargs):
+        """
+        Assert that the tokens and spans of the incremental tokeniser are the
+        same as those of tokenising its string from scratch.
+        """
+        self.assertEqual(
+            tokeniser.tokens, tokenise(tokeniser.string, **kwargs)
+        )
+        self.assertEqual(
+            tokeniser.spans(), tokenise_spans(tokeniser.string, **kwargs)
+        )
+
+    def test_edits(self):
+        tokeniser = IncrementalTokeniser('ˈtiːt͡ʃə ʦa')
+        self.assertEqual(tokeniser.tokens, ['t', 'iː', 't͡ʃ', 'ə', 'ʦ', 'a'])
+
+        tokeniser.insert(2, 'ʰ')
+        self.assertEqual(str(tokeniser), 'ˈtʰiːt͡ʃə ʦa')
+        self.assertEqual(tokeniser.tokens[:2], ['tʰ', 'iː'])
+        self.assertTokens(tokeniser)
+
+        tokeniser.delete(6, 1)  # the tie bar
+        self.assertEqual(tokeniser.tokens[2:4], ['t', 'ʃ'])
+        self.assertTokens(tokeniser)
+
+        tokeniser.insert(6, '͡')
+        tokeniser.replace(8, 9, ' ')  # split the word
+        self.assertEqual(tokeniser.string, 'ˈtʰiːt͡ʃ  ʦa')
+        self.assertTokens(tokeniser)
+
+        tokeniser.replace(8, 10, '')  # join the words
+        self.assertEqual(tokeniser.tokens, ['tʰ', 'iː', 't͡ʃ', 'ʦ', 'a'])
+        self.assertTokens(tokeniser)
+
+        tokeniser.delete(0, len(tokeniser))
+        self.assertEqual(tokeniser.tokens, [])
+
+    def test_errors(self):
+        tokeniser = IncrementalTokeniser('ta', strict=True)
+
+        with self.assertRaises(ValueError):
+            tokeniser.insert(1, 'ʦ')
+
+        with self.assertRaises(ValueError):
+            tokeniser.delete(1, 2)
+
+        self.assertEqual(tokeniser.string, 'ta')
+        self.assertEqual(tokeniser.tokens, ['t', 'a'])
+
+    def test_random_edits(self):
+        """
+        Random edits should yield the same tokens as tokenising from scratch,
+        whatever the options.
+        """
+        rnd = random.Random(42)
+        chars = list('tapʃiə ̯ʰ̃ːˈ˥˩͡ʦg') + ['ç', 'c', '̧']
+
+        for kwargs in [
+            {},
+            {'replace': True, 'tones': True},
+            {'unknown': True, 'tones': True},
+            {'diphthongs': True},
+            {'merge': are_diphthong},
+        ]:
+            tokeniser = IncrementalTokeniser('ˈtiːt͡ʃə ʦa', **kwargs)
+
+            for _ in range(300):
+                start = rnd.randint(0, len(tokeniser))
+                end = rnd.randint(start, min(start + 3, len(tokeniser)))
+                text = ''.join(rnd.choices(chars, k=rnd.randint(0, 3)))
+
+                string = tokeniser.string
+                new_string = string[:start] + text + string[end:]
+
+                try:
+                    tokenise(new_string, **kwargs)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        tokeniser.replace(start, end, text)
+                    self.assertEqual(tokeniser.string, string)
+                else:
+                    tokeniser.replace(start, end, text)
+                    self.assertEqual(tokeniser.string, new_string)
+
+                self.assertTokens(tokeniser, **kwargs)
@@ -1,6 +1,11 @@
+import os.path
+import shutil
 from functools import partial
+from tempfile import TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
 
+from ipatok import ipa
 from ipatok.ipa import (
     is_letter,
     is_vowel,
@@ -206,11 +211,134 @@ class IpaTestCase(TestCase):
             self.assertFalse(is_tone(char, strict=True))
             self.assertTrue(is_tone(char, strict=False))
 
+    def test_tables(self):
+        """
+        The classification tables should agree with the is_ functions, also
+        for characters that are not part of the chart.
+        """
+        funcs = [
+            (ipa.LETTER, is_letter),
+            (ipa.DIACRITIC, is_diacritic),
+            (ipa.SUPRASEGMENTAL, is_suprasegmental),
+            (ipa.TONE, is_tone),
+        ]
+
+        chars = ['p', 'ç', 'ʰ', 'ː', '˥', 'ꜛ', 'ʣ', 'ˀ', '꜍', '$', '◌̇'[1]]
+
+        for char in chars:
+            for strict in [True, False]:
+                flags = chart.get_table(strict)[char]
+
+                for flag, func in funcs:
+                    self.assertEqual(bool(flags & flag), func(char, strict))
+
+                self.assertEqual(bool(flags & ipa.VOWEL), is_vowel(char))
+                self.assertEqual(bool(flags & ipa.TIE_BAR), is_tie_bar(char))
+                self.assertEqual(bool(flags & ipa.LENGTH), is_length(char))
+
+        self.assertIn('$', chart.strict_table)
+        self.assertIn('$', chart.loose_table)
+
     def test_get_precomposed_chars(self):
         self.assertEqual(get_precomposed_chars(), set(['ç']))
+        self.assertEqual(chart.precomposed, {'c\u0327': '\u00e7'})
 
     def test_replace_substitutes(self):
         self.assertEqual(replace_substitutes('g'), 'ɡ')
         self.assertEqual(replace_substitutes('ł'), 'l̴')
         self.assertEqual(replace_substitutes('ɫ'), 'l̴')
         self.assertEqual(replace_substitutes('·'), 'ˑ')
+
+    def test_replace_substitutes_overlapping(self):
+        """
+        Overlapping substitutes should be replaced in a single pass, preferring
+        the longest match regardless of the order in the file.
+        """
+        with TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'replacements.tsv')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write('t\tʈ\nts\tt͡s\ns\tʃ\n')
+
+            custom_chart = ipa.Chart()
+            custom_chart.load_replacements(file_path)
+
+        with patch('ipatok.ipa.chart', custom_chart):
+            self.assertEqual(replace_substitutes('tsats'), 't͡sat͡s')
+            self.assertEqual(replace_substitutes('tast'), 'ʈaʃʈ')
+
+    def test_load_chart(self):
+        """
+        Charts should be loaded from the pickle unless the data files have
+        changed since it was created.
+        """
+        with TemporaryDirectory() as temp_dir:
+            ipa_path = os.path.join(temp_dir, 'ipa.tsv')
+            replacements_path = os.path.join(temp_dir, 'replacements.tsv')
+            pickle_path = os.path.join(temp_dir, 'chart.pickle')
+
+            shutil.copy(ipa.IPA_CHART_PATH, ipa_path)
+            shutil.copy(ipa.REPLACEMENTS_PATH, replacements_path)
+
+            paths = (ipa_path, replacements_path, pickle_path)
+
+            chart_a = ipa.load_chart(*paths)
+            self.assertTrue(os.path.exists(pickle_path))
+
+            # the pickle should have the permissions of other new files
+            with open(os.path.join(temp_dir, 'other'), 'wb') as f:
+                self.assertEqual(
+                    os.stat(pickle_path).st_mode, os.stat(f.fileno()).st_mode
+                )
+
+            chart_b = ipa.load_chart(*paths)
+            self.assertEqual(chart_b.vowels, chart.vowels)
+            self.assertEqual(chart_b.replacements, chart_a.replacements)
+            self.assertEqual(chart_b.strict_table['p'], ipa.LETTER)
+            self.assertIs(chart_b.strict_table.chart, chart_b)
+            self.assertEqual(chart_b.replace_substitutes('ʦa'), 't͡sa')
+
+            with open(replacements_path, 'a', encoding='utf-8') as f:
+                f.write('ʞ\tk\n')
+
+            chart_c = ipa.load_chart(*paths)
+            self.assertEqual(chart_c.replacements['ʞ'], 'k')
+            self.assertEqual(ipa.load_chart(*paths).replacements['ʞ'], 'k')
+
+            chart_d = ipa.load_chart(ipa_path, replacements_path, None)
+            self.assertEqual(chart_d.replacements, chart_c.replacements)
+
+    def test_custom_chart(self):
+        """
+        Charts loaded from custom files should be independent of the default
+        chart and of each other.
+        """
+        with TemporaryDirectory() as temp_dir:
+            ipa_path = os.path.join(temp_dir, 'ipa.tsv')
+            replacements_path = os.path.join(temp_dir, 'replacements.tsv')
+
+            with open(ipa_path, 'w', encoding='utf-8') as f:
+                f.write('# consonants (pulmonic)\np\nt\n\ua7b5\n')
+                f.write('# vowels\na\n# diacritics\n\u02b0\n')
+
+            with open(replacements_path, 'w', encoding='utf-8') as f:
+                f.write('g\tk\n')
+
+            chart_a = ipa.load_chart(ipa_path, replacements_path)
+            chart_b = ipa.load_chart(ipa_path, None)
+
+        self.assertTrue(is_letter('\ua7b5', chart=chart_a))
+        self.assertFalse(is_letter('\ua7b5'))
+        self.assertFalse(is_vowel('e', chart=chart_a))
+        self.assertTrue(is_diacritic('\u02b0', chart=chart_a))
+        self.assertFalse(is_diacritic('\u02b0', True, ipa.Chart()))
+
+        self.assertEqual(replace_substitutes('ga', chart_a), 'ka')
+        self.assertEqual(replace_substitutes('ga', chart_b), 'ga')
+        self.assertEqual(replace_substitutes('ga'), 'ɡa')
+
+        self.assertEqual(get_precomposed_chars(chart_a), set())
+        self.assertEqual(get_precomposed_chars(), set(['ç']))
+
+    def test_get_chart(self):
+        self.assertIs(ipa.get_chart(), chart)
+        self.assertIs(ipa.get_chart(), ipa.chart)
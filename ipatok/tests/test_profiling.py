@@ -0,0 +1,123 @@
+import threading
+from unittest import TestCase
+
+from ipatok import tokens
+from ipatok.counts import SegmentCounter
+from ipatok.profiling import Profile, profile
+from ipatok.tokens import Tokeniser, are_diphthong, tokenise
+
+
+class ProfilingTestCase(TestCase):
+    def test_profile(self):
+        tokeniser = Tokeniser(
+            replace=True, diphthongs=True, merge=are_diphthong
+        )
+
+        with profile() as stats:
+            tokeniser.tokenise('ʦaɪ̯ ʦaɪ̯')
+            tokeniser.clusterise('ut͡ʃa')
+
+        self.assertIsNone(tokens.active_profile.get())
+
+        output = stats.as_dict()
+        self.assertEqual(output['stages']['tokenise']['count'], 2)
+        self.assertEqual(output['words'], 3)
+
+        for stage in ['normalise', 'replace', 'classify', 'diphthongs']:
+            self.assertEqual(output['stages'][stage]['count'], 3)
+            self.assertGreaterEqual(output['stages'][stage]['time'], 0)
+
+        self.assertEqual(output['stages']['merge']['count'], 3)
+        self.assertEqual(
+            output['cache'], {'hits': 0, 'misses': 0, 'hit_rate': None}
+        )
+
+        tokeniser.tokenise('ʦa')
+        self.assertEqual(stats.as_dict(), output)
+
+    def test_cache(self):
+        tokeniser = Tokeniser(cache_size=10)
+
+        with profile() as stats:
+            tokeniser.tokenise('ta ta ta ʃa')
+
+        output = stats.as_dict()
+        self.assertEqual(output['stages']['classify']['count'], 2)
+        self.assertNotIn('replace', output['stages'])
+        self.assertEqual(
+            output['cache'], {'hits': 2, 'misses': 2, 'hit_rate': 0.5}
+        )
+
+        # process_word is also called directly, e.g. by SegmentCounter
+        tokeniser = Tokeniser(cache_size=10)
+        counter = SegmentCounter()
+
+        with profile() as stats:
+            counter.update(['ta ʃa', 'ta'], tokeniser)
+            counter.update(['ta ʃa pa'], tokeniser)
+
+        self.assertEqual(
+            stats.as_dict()['cache'], {'hits': 2, 'misses': 3, 'hit_rate': 0.4}
+        )
+
+    def test_errors(self):
+        """
+        Stages that raise should still be recorded, and nested profiles should
+        not interfere with each other.
+        """
+        stats = Profile()
+
+        with profile(stats):
+            with self.assertRaises(ValueError):
+                tokenise('ʦa', strict=True)
+
+            with profile() as inner_stats:
+                tokenise('ta')
+
+            self.assertIs(tokens.active_profile.get(), stats)
+
+        self.assertEqual(stats.as_dict()['stages']['classify']['count'], 1)
+        self.assertEqual(inner_stats.as_dict()['words'], 1)
+
+        stats.reset()
+        self.assertEqual(stats.as_dict()['stages'], {})
+
+    def test_threads(self):
+        """
+        Overlapping profiles in different threads should only record their
+        own thread's calls and should leave nothing active when done.
+        """
+        first_entered = threading.Event()
+        second_exited = threading.Event()
+        outputs = {}
+
+        def first():
+            with profile() as stats:
+                first_entered.set()
+                tokenise('ta')
+                second_exited.wait()
+                tokenise('ta')
+            outputs['first'] = stats.as_dict()['words']
+
+        def second():
+            first_entered.wait()
+            with profile() as stats:
+                tokenise('ta ta ta')
+            second_exited.set()
+            outputs['second'] = stats.as_dict()['words']
+
+        threads = [threading.Thread(target=func) for func in [first, second]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outputs, {'first': 2, 'second': 3})
+        self.assertIsNone(tokens.active_profile.get())
+
+        with profile() as stats:
+            thread = threading.Thread(target=tokenise, args=('ta',))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(stats.as_dict()['words'], 0)
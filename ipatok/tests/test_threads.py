@@ -0,0 +1,99 @@
+import pickle
+import sys
+import threading
+from unittest import TestCase
+
+from ipatok import ipa
+from ipatok.benchmarks import make_corpus
+from ipatok.tokens import THREAD, Tokeniser, clusterise_many, tokenise_many
+
+
+class ThreadsTestCase(TestCase):
+    def setUp(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def test_frozen_chart(self):
+        chart = ipa.get_chart()
+
+        self.assertTrue(chart.frozen)
+        self.assertIsInstance(chart.vowels, frozenset)
+
+        with self.assertRaises(TypeError):
+            chart.replacements['g'] = 'k'
+
+        with self.assertRaises(RuntimeError):
+            chart.load_replacements(ipa.REPLACEMENTS_PATH)
+
+        copy = pickle.loads(pickle.dumps(chart))
+        self.assertTrue(copy.frozen)
+        self.assertEqual(copy.replacements, chart.replacements)
+        self.assertIsInstance(copy.vowels, frozenset)
+
+    def test_shared_tokeniser(self):
+        """
+        Threads sharing a tokeniser with empty tables and cache should get the
+        same output as tokenising serially.
+        """
+        strings = make_corpus(2000, seed=17, substitutes=True)
+
+        def make_tokeniser(cache_size):
+            chart = ipa.load_chart(ipa.IPA_CHART_PATH, ipa.REPLACEMENTS_PATH)
+            return Tokeniser(
+                replace=True,
+                diphthongs=True,
+                tones=True,
+                unknown=True,
+                cache_size=cache_size,
+                chart=chart,
+            )
+
+        tokeniser = make_tokeniser(0)
+        expected = [tokeniser.tokenise(string) for string in strings]
+
+        for cache_size in [0, 64]:
+            tokeniser = make_tokeniser(cache_size)
+            barrier = threading.Barrier(8)
+            outputs = [None] * 8
+
+            def work(index):
+                barrier.wait()
+                outputs[index] = [
+                    tokeniser.tokenise(string)
+                    for string in strings[index:] + strings[:index]
+                ]
+
+            threads = [
+                threading.Thread(target=work, args=(index,))
+                for index in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for index, output in enumerate(outputs):
+                self.assertEqual(output, expected[index:] + expected[:index])
+
+    def test_thread_backend(self):
+        strings = make_corpus(500, seed=3) + ['ʦa']
+
+        self.assertEqual(
+            tokenise_many(strings, workers=4, backend=THREAD),
+            tokenise_many(strings),
+        )
+        self.assertEqual(
+            clusterise_many(
+                strings, flat=True, workers=3, chunk_size=7, backend=THREAD
+            ),
+            clusterise_many(strings, flat=True),
+        )
+
+        with self.assertRaises(ValueError):
+            tokenise_many(strings, strict=True, workers=4, backend=THREAD)
+
+        with self.assertRaises(ValueError):
+            tokenise_many(strings, workers=2, backend='fibre')
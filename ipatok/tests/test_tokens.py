@@ -1,16 +1,46 @@
+import os.path
+import subprocess
+import sys
+from dataclasses import dataclass
 from functools import partial
 from itertools import product
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import patch
 
+import ipatok
+from ipatok import ipa
 from ipatok.tokens import (
+    Tokeniser,
+    clusterise_many,
+    compile,
+    cv_skeleton,
     normalise,
+    normalise_spans,
     group,
+    group_diphthongs,
     are_diphthong,
+    VowelFeatures,
     tokenise,
+    tokenise_many,
+    tokenise_spans,
     clusterise,
     replace_digits_with_chao,
 )
+from ipatok.vocab import Vocabulary
+
+
+@dataclass
+class MergeStops:
+    """
+    Merge function that groups consecutive stops; as a dataclass with eq, its
+    instances are not hashable.
+    """
+
+    stops: str = 'ptk'
+
+    def __call__(self, tokenA, tokenB):
+        return tokenA[-1] in self.stops and tokenB[0] in self.stops
 
 
 class TokensTestCase(TestCase):
@@ -27,6 +57,19 @@ class TokensTestCase(TestCase):
         self.assertEqual(normalise('nɪçt'), 'nɪçt')  # ç in normal form C
         self.assertEqual(normalise('nɪçt'), 'nɪçt')  # ç in normal form D
 
+    def test_normalise_spans(self):
+        """
+        Each character of the normalised string should be mapped onto the
+        characters of the input it comes from, also if these are reordered.
+        """
+        string, spans = normalise_spans('nɪc\u0327t')
+        self.assertEqual(string, normalise('nɪc\u0327t'))
+        self.assertEqual(spans, [(0, 1), (1, 2), (2, 4), (4, 5)])
+
+        string, spans = normalise_spans('\u0151\u0325b')
+        self.assertEqual(string, 'o\u0325\u030bb')
+        self.assertEqual(spans, [(0, 1), (1, 2), (0, 1), (2, 3)])
+
     def test_group(self):
         self.assertEqual(group(lambda: True, []), [])
 
@@ -44,6 +87,31 @@ class TokensTestCase(TestCase):
         self.assertFalse(are_diphthong('əə̯', 'ə'))
         self.assertFalse(are_diphthong('ə̯ə', 'ə'))
 
+        self.assertTrue(are_diphthong('aː', 'ɪ̯'))
+        self.assertTrue(are_diphthong('a', '\u032fɪ'))
+        self.assertFalse(are_diphthong('a', 't'))
+        self.assertFalse(are_diphthong('ː', 'a'))
+        self.assertFalse(are_diphthong('t͡s', 'a'))
+
+    def test_group_diphthongs(self):
+        """
+        Grouping in a single pass should be the same as grouping with the
+        are_diphthong function.
+        """
+        features = VowelFeatures(ipa.chart.strict_table)
+
+        for tokens in [
+            [],
+            ['a'],
+            ['a', 'ɪ̯', 'ʊ̯', 'e', 'ə̯', 'a', 't', 'ʊ̯'],
+            ['ə̯', 'ə̯', 'ə', 'ə̯', 'ə'],
+            ['a', '\u032f', 'i', 'aː', 'ː', 'u̯'],
+        ]:
+            self.assertEqual(
+                group_diphthongs(features, tokens),
+                group(are_diphthong, tokens),
+            )
+
     def test_tokenise(self):
         """
         IPA-compliant strings should be correctly tokenised, regardless of the
@@ -282,6 +350,171 @@ class TokensTestCase(TestCase):
                 ['e', 't', 'ɬ', 'ə', 't', 'i', 't', 'e'],
             )
 
+    def test_compile(self):
+        """
+        Compiled tokenisers should be cached and should tokenise as tokenise
+        does with the same options.
+        """
+        self.assertIsInstance(compile(), Tokeniser)
+        self.assertIs(compile(tones=True), compile(tones=True))
+        self.assertIs(
+            compile(True, tones=True), compile(strict=True, tones=True)
+        )
+        self.assertIs(compile(False, False), compile())
+
+        # unhashable options cannot be cached but should still work
+        merge = MergeStops()
+        self.assertIsNot(compile(merge=merge), compile(merge=merge))
+        self.assertEqual(tokenise('apta', merge=merge), ['a', 'pt', 'a'])
+        self.assertIsNot(compile(tones=True), compile(tones=False))
+
+        for comb in product(*[[True, False]] * 5):
+            tokeniser = Tokeniser(*comb)
+
+            for string in ['t͡saɪ̯çən', 'ɕia˥˩ ɕyɛ˨˩˦', 'ɫuna', '_-/$ ʷəˈʁʷa']:
+                try:
+                    expected = tokenise(string, *comb)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        tokeniser.tokenise(string)
+                else:
+                    self.assertEqual(tokeniser.tokenise(string), expected)
+
+    def test_tokeniser_cache(self):
+        """
+        Tokenisers with a cache should keep track of repeated words, without
+        this affecting their output.
+        """
+        tokeniser = Tokeniser(diphthongs=True, cache_size=2)
+        self.assertEqual(tokeniser.cache_info().currsize, 0)
+
+        for _ in range(3):
+            self.assertEqual(
+                tokeniser.tokenise('aɪ̯ çən aɪ̯'), ['aɪ̯', 'ç', 'ə', 'n', 'aɪ̯']
+            )
+
+        info = tokeniser.cache_info()
+        self.assertEqual((info.hits, info.misses), (7, 2))
+        self.assertEqual((info.maxsize, info.currsize), (2, 2))
+
+        tokeniser.tokenise('na')
+        self.assertEqual(tokeniser.cache_info().currsize, 2)
+
+        tokeniser.cache_clear()
+        self.assertEqual(tokeniser.cache_info().currsize, 0)
+
+        self.assertIsNone(Tokeniser().cache_info())
+
+    def test_tokenise_spans(self):
+        """
+        The spans should point to the parts of the input the tokens come from,
+        regardless of normalising and replacing substitutes.
+        """
+        self.assertEqual(
+            tokenise_spans('ˈtiːt͡ʃə ʃa'),
+            [
+                ('t', 1, 2),
+                ('iː', 2, 4),
+                ('t͡ʃ', 4, 7),
+                ('ə', 7, 8),
+                ('ʃ', 9, 10),
+                ('a', 10, 11),
+            ],
+        )
+        self.assertEqual(
+            tokenise_spans('ʦaɪ̯ ɫuna', replace=True, diphthongs=True),
+            [
+                ('t͡s', 0, 1),
+                ('aɪ̯', 1, 4),
+                ('l̴', 5, 6),
+                ('u', 6, 7),
+                ('n', 7, 8),
+                ('a', 8, 9),
+            ],
+        )
+        self.assertEqual(
+            tokenise_spans('nic\u0327t'),
+            [('n', 0, 1), ('i', 1, 2), ('\u00e7', 2, 4), ('t', 4, 5)],
+        )
+        self.assertEqual(
+            tokenise_spans('aˈʰ ɕa˥˩', tones=True),
+            [('aʰ', 0, 3), ('ɕ', 4, 5), ('a', 5, 6), ('˥˩', 6, 8)],
+        )
+        self.assertEqual(tokenise_spans(' '), [])
+
+        for comb in product(*[[True, False]] * 5):
+            for string in ['t͡saɪ̯çən', 'ʷəˈʁʷa -', 'ɫuna', 'ə̋ə̏ ˨˩˦']:
+                try:
+                    expected = tokenise(string, *comb)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        tokenise_spans(string, *comb)
+                else:
+                    output = tokenise_spans(string, *comb)
+                    self.assertEqual([x[0] for x in output], expected)
+
+    def test_tokenise_many(self):
+        """
+        Batch tokenising should yield the same tokens as tokenising the strings
+        one by one, also if the strings are repeated or given as a generator.
+        """
+        strings = ['t͡saɪ̯çən', 'ut͡ʃa sɛ', '', 't͡saɪ̯çən', 'moːɐ̯']
+
+        for diphthongs in [True, False]:
+            expected = [tokenise(s, diphthongs=diphthongs) for s in strings]
+
+            output = tokenise_many(iter(strings), diphthongs=diphthongs)
+            self.assertEqual(output, expected)
+            self.assertIsNot(output[0], output[3])
+
+            tokens, offsets = tokenise_many(
+                strings, diphthongs=diphthongs, flat=True
+            )
+            self.assertEqual(len(offsets), len(strings) + 1)
+            self.assertEqual(
+                [tokens[i:j] for i, j in zip(offsets, offsets[1:])], expected
+            )
+
+        self.assertEqual(tokenise_many([]), [])
+        tokens, offsets = tokenise_many([], flat=True)
+        self.assertEqual((tokens, list(offsets)), ([], [0]))
+
+        with self.assertRaises(ValueError):
+            tokenise_many(['prɤst', 'ʷəˈʁʷa'], strict=True)
+
+    def test_tokenise_many_workers(self):
+        """
+        Tokenising in parallel should yield the same output in the same order
+        as tokenising serially, provided that the merge function is picklable.
+        """
+        strings = ['t͡saɪ̯çən', 'ut͡ʃa sɛ', 'moːɐ̯', 't͡saɪ̯çən'] * 10
+
+        self.assertEqual(
+            tokenise_many(strings, merge=are_diphthong, workers=2),
+            tokenise_many(strings, merge=are_diphthong),
+        )
+
+        self.assertEqual(
+            tokenise_many(strings, flat=True, workers=2, chunk_size=1),
+            tokenise_many(strings, flat=True),
+        )
+
+        with self.assertRaises(ValueError):
+            tokenise_many(['ʷəˈʁʷa'] * 4, strict=True, workers=2)
+
+        with self.assertRaises(ValueError):
+            tokenise_many(strings, merge=lambda a, b: False, workers=2)
+
+    def test_clusterise_many(self):
+        self.assertEqual(
+            clusterise_many(['kiaːltaːʃ', 'sɫɤnt͡sɛ']),
+            [['k', 'iaː', 'lt', 'aː', 'ʃ'], ['sɫ', 'ɤ', 'nt͡s', 'ɛ']],
+        )
+        self.assertEqual(
+            clusterise_many(['kiaːltaːʃ'] * 3, workers=2),
+            [['k', 'iaː', 'lt', 'aː', 'ʃ']] * 3,
+        )
+
     def test_replace_digits_with_chao(self):
         """
         Digits should be correctly replaced with Chao tone letters, regardless
@@ -318,25 +551,113 @@ class TokensTestCase(TestCase):
             clusterise('kiaːltaːʃ'), ['k', 'iaː', 'lt', 'aː', 'ʃ']
         )
         self.assertEqual(clusterise('sɫɤnt͡sɛ'), ['sɫ', 'ɤ', 'nt͡s', 'ɛ'])
+        self.assertEqual(clusterise(''), [])
+        self.assertEqual(clusterise('ˈ'), [])
+
+        self.assertEqual(
+            clusterise('ɕia˥˩ɕyɛ˨˩˦', tones=True),
+            ['ɕ', 'ia', '˥˩ɕ', 'yɛ', '˨˩˦'],
+        )
+        self.assertEqual(
+            clusterise('ʷəˈʁʷa-/', unknown=True), ['ʷ', 'ə', 'ʁʷ', 'a', '-/']
+        )
+
+    def test_cv_skeleton(self):
+        self.assertEqual(cv_skeleton('kiaːltaːʃ'), 'CVVCCVC')
+        self.assertEqual(cv_skeleton('kiaːltaːʃ', diphthongs=True), 'CVVCCVC')
+        self.assertEqual(cv_skeleton('t͡saɪ̯çən', diphthongs=True), 'CVCVC')
+        self.assertEqual(cv_skeleton('ɕia˥˩', tones=True), 'CVVX')
+        self.assertEqual(cv_skeleton('ʷa $', unknown=True), 'XVX')
+        self.assertEqual(cv_skeleton(''), '')
+
+    def test_custom_chart(self):
+        """
+        Tokenisers with custom charts should not interfere with each other.
+        """
+        with TemporaryDirectory() as temp_dir:
+            ipa_path = os.path.join(temp_dir, 'ipa.tsv')
+            replacements_path = os.path.join(temp_dir, 'replacements.tsv')
+
+            with open(ipa_path, 'w', encoding='utf-8') as f:
+                f.write('# consonants (pulmonic)\nt\n\ua7b5\n')
+                f.write('# vowels\na\n# diacritics\n\u02b0\n\u032f\n')
+
+            with open(replacements_path, 'w', encoding='utf-8') as f:
+                f.write('g\tk\n')
+
+            chart = ipa.load_chart(ipa_path, replacements_path)
+
+        self.assertEqual(
+            tokenise('\ua7b5a\u02b0ta', strict=True, chart=chart),
+            ['\ua7b5', 'a\u02b0', 't', 'a'],
+        )
+        with self.assertRaises(ValueError):
+            tokenise('\ua7b5a\u02b0ta', strict=True)
+        with self.assertRaises(ValueError):
+            tokenise('pa', strict=True, chart=chart)
+
+        self.assertEqual(tokenise('ga', replace=True, chart=chart), ['k', 'a'])
+        self.assertEqual(tokenise('ga', replace=True), ['ɡ', 'a'])
+        self.assertEqual(
+            clusterise('gata', replace=True, chart=chart), ['k', 'a', 't', 'a']
+        )
+        self.assertEqual(
+            tokenise_spans('ga\u032f', replace=True, chart=chart),
+            [('k', 0, 1), ('a\u032f', 1, 3)],
+        )
+
+        self.assertIs(compile(chart=chart).chart, chart)
+        self.assertIsNot(compile(chart=chart), compile())
 
     def test_clusterise_arguments_are_forwarded(self):
         """
-        Keyword arguments given to clusterise should be forwarded to tokenise.
+        Keyword arguments given to clusterise should be forwarded to the
+        tokeniser.
         """
-        with patch('ipatok.tokens.tokenise') as tokenise_mock:
-            tokenise_mock.return_value = ['k', 'i', 'aː', 'l', 't', 'aː', 'ʃ']
+        with patch('ipatok.tokens.compile') as compile_mock:
+            tokeniser = compile_mock.return_value
+            tokeniser.clusterise.return_value = ['k', 'iaː', 'lt', 'aː', 'ʃ']
 
             clusterise('kiaːltaːʃ')
-            tokenise_mock.assert_called_with(
-                'kiaːltaːʃ', False, False, False, False, False, None
+            compile_mock.assert_called_with(
+                False, False, False, False, False, None, chart=None
             )
+            tokeniser.clusterise.assert_called_with('kiaːltaːʃ')
 
             clusterise('kiaːltaːʃ', True, True, True, True, True, None)
-            tokenise_mock.assert_called_with(
-                'kiaːltaːʃ', True, True, True, True, True, None
+            compile_mock.assert_called_with(
+                True, True, True, True, True, None, chart=None
             )
 
             clusterise('kiaːltaːʃ', merge=None, unknown=True)
-            tokenise_mock.assert_called_with(
-                'kiaːltaːʃ', False, False, False, False, True, None
+            compile_mock.assert_called_with(
+                False, False, False, False, True, None, chart=None
             )
+
+    def test_lazy_names(self):
+        """
+        The names that ipatok defines in its other modules should be imported
+        on first access, so that importing ipatok only imports the tokens and
+        ipa modules, even after tokenising.
+        """
+        code = (
+            'import sys, ipatok; ipatok.tokenise("ta"); '
+            'print(sorted(name for name in sys.modules '
+            'if name.startswith("ipatok")))'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+
+        self.assertEqual(
+            output.strip(), "['ipatok', 'ipatok.ipa', 'ipatok.tokens']"
+        )
+
+        self.assertIs(ipatok.Vocabulary, Vocabulary)
+        self.assertIn('Vocabulary', dir(ipatok))
+
+        with self.assertRaises(AttributeError):
+            ipatok.Vocabularies
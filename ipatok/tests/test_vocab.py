@@ -0,0 +1,86 @@
+import os.path
+from array import array
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipIf
+
+from ipatok import ipa
+from ipatok.tokens import compile, tokenise_many
+from ipatok.vocab import Vocabulary
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class VocabularyTestCase(TestCase):
+    def test_seed(self):
+        """
+        The default vocabulary should include all the letters of the chart.
+        """
+        vocab = Vocabulary()
+        chart = ipa.get_chart()
+
+        self.assertEqual(len(vocab), len(chart.consonants | chart.vowels))
+        self.assertEqual(vocab.decode(vocab.encode(['a', 'ʃ'])), ['a', 'ʃ'])
+        self.assertEqual(Vocabulary(), vocab)
+
+    def test_encode(self):
+        vocab = Vocabulary(['t', 'a'])
+
+        ids = vocab.encode(['t', 'a', 't͡s', 'aː', 't͡s'])
+        self.assertIsInstance(ids, array)
+        self.assertEqual(list(ids), [0, 1, 2, 3, 2])
+        self.assertEqual(list(vocab), ['t', 'a', 't͡s', 'aː'])
+
+        vocab.grow = False
+        with self.assertRaises(ValueError):
+            vocab.encode(['ə'])
+
+        for segment in ['', 'a a', 'a\n', None]:
+            with self.assertRaises(ValueError):
+                vocab.add(segment)
+
+        for ids in [[0, 4], [-1], [0, 'a']]:
+            with self.assertRaises(ValueError):
+                vocab.decode(ids)
+
+    def test_encode_many(self):
+        strings = ['ˈtiːt͡ʃə', 'ʦa', '', 'ˈtiːt͡ʃə']
+        tokeniser = compile(replace=True)
+        vocab = Vocabulary([])
+
+        ids, offsets = vocab.encode_many(strings, tokeniser)
+        self.assertEqual(list(ids), [0, 1, 2, 3, 4, 5, 0, 1, 2, 3])
+        self.assertEqual(list(offsets), [0, 4, 6, 6, 10])
+        self.assertEqual(
+            vocab.decode_many(ids, offsets),
+            tokenise_many(strings, replace=True),
+        )
+
+        with self.assertRaises(ValueError):
+            vocab.encode_many(['ʦa'], compile(strict=True))
+
+    @skipIf(numpy is None, 'NumPy is not installed')
+    def test_encode_many_numpy(self):
+        vocab = Vocabulary()
+        ids, offsets = vocab.encode_many(['ta', 'ʃa'], as_numpy=True)
+
+        self.assertEqual(ids.dtype, numpy.uint32)
+        self.assertEqual(offsets.tolist(), [0, 2, 4])
+        self.assertEqual(vocab.decode(ids.tolist()), ['t', 'a', 'ʃ', 'a'])
+
+    def test_save_load(self):
+        vocab = Vocabulary()
+        vocab.encode(['t͡s', 'aː', '˥˩'])
+
+        with TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'vocab.txt')
+            vocab.save(file_path)
+            self.assertEqual(Vocabulary.load(file_path), vocab)
+
+            with open(file_path, 'a', encoding='utf-8') as f:
+                f.write('t͡s\n')
+
+            with self.assertRaises(ValueError):
+                Vocabulary.load(file_path)
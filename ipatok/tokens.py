@@ -1,24 +1,114 @@
+import contextvars
+import functools
+import time
 import unicodedata
+from array import array
 
 from ipatok import ipa
 
 
-def normalise(string):
+def normalise(string, chart=None):
     """
     Convert each character of the string to the normal form in which it was
-    defined in the IPA spec. This would be normal form D, except for the
-    voiceless palatar fricative (ç) which should be in normal form C.
+    defined in the IPA spec (or in the given chart). This would be normal form
+    D, except for the voiceless palatar fricative (ç) which should be in
+    normal form C.
 
     Helper for tokenise_word(string, ..).
     """
-    string = unicodedata.normalize('NFD', string)
+    if string.isascii():
+        return string
 
-    for char_c in ipa.get_precomposed_chars():
-        char_d = unicodedata.normalize('NFD', char_c)
-        if char_d in string:
-            string = string.replace(char_d, char_c)
+    if chart is None:
+        chart = ipa.get_chart()
 
-    return string
+    return chart.recompose(unicodedata.normalize('NFD', string))
+
+
+def normalise_spans(string, chart=None):
+    """
+    Like normalise(string) but return a (normalised string, spans) tuple. The
+    spans list comprises a (start, end) tuple for each character of the
+    normalised string, delimiting the part of the input it comes from.
+
+    Helper for Tokeniser.tokenise_word_spans(word).
+    """
+    chars = []
+    spans = []
+
+    for index, char in enumerate(string):
+        for char_d in unicodedata.normalize('NFD', char):
+            chars.append(char_d)
+            spans.append((index, index + 1))
+
+    # canonical ordering: sort each run of combining chars by combining class
+    index = 0
+    while index < len(chars):
+        if not unicodedata.combining(chars[index]):
+            index += 1
+            continue
+
+        end = index
+        while end < len(chars) and unicodedata.combining(chars[end]):
+            end += 1
+
+        order = sorted(
+            range(index, end), key=lambda i: unicodedata.combining(chars[i])
+        )
+        chars[index:end] = [chars[i] for i in order]
+        spans[index:end] = [spans[i] for i in order]
+
+        index = end
+
+    string = ''.join(chars)
+
+    if chart is None:
+        chart = ipa.get_chart()
+
+    precomposed_re = chart.get_precomposed_re()
+
+    if precomposed_re is not None:
+        string, spans = substitute_spans(
+            string, spans, precomposed_re, chart.precomposed
+        )
+
+    return string, spans
+
+
+def substitute_spans(string, spans, regex, mapping):
+    """
+    Replace the regex matches in the string with their values in the mapping
+    and return a (new string, new spans) tuple. Each of the characters that
+    replace a match spans all the characters of the latter.
+
+    Helper for normalise_spans(string) and Tokeniser.tokenise_word_spans(..).
+    """
+    if regex is None:
+        return string, spans
+
+    parts = []
+    new_spans = []
+    prev_end = 0
+
+    for match in regex.finditer(string):
+        parts.append(string[prev_end : match.start()])
+        new_spans.extend(spans[prev_end : match.start()])
+
+        value = mapping[match.group()]
+        span = (spans[match.start()][0], spans[match.end() - 1][1])
+
+        parts.append(value)
+        new_spans.extend([span] * len(value))
+
+        prev_end = match.end()
+
+    if not parts:
+        return string, spans
+
+    parts.append(string[prev_end:])
+    new_spans.extend(spans[prev_end:])
+
+    return ''.join(parts), new_spans
 
 
 def group(merge_func, tokens):
@@ -59,101 +149,940 @@ def are_diphthong(tokenA, tokenB):
 
     Helper for tokenise(string, ..).
     """
+    table = ipa.chart.strict_table
 
-    def is_short(token):
-        return '◌̯'[1] in token
+    return (
+        merge_vowels(
+            get_vowel_features(tokenA, table),
+            get_vowel_features(tokenB, table),
+        )
+        is not None
+    )
 
-    subtokens = []
 
-    for char in tokenA + tokenB:
-        if ipa.is_vowel(char):
-            subtokens.append(char)
-        elif ipa.is_diacritic(char) or ipa.is_length(char):
-            if subtokens:
-                subtokens[-1] += char
-            else:
-                break
+def group_diphthongs(features, tokens):
+    """
+    Group together the tokens that can form diphthongs, as are_diphthong
+    would, in a single pass. The features should be a VowelFeatures instance;
+    the features of each group are worked out from those of its tokens, so
+    the characters of each token are only looked at once.
+
+    Helper for Tokeniser.group_tokens(tokens).
+    """
+    output = []
+    prev = None
+
+    for token in tokens:
+        curr = features[token]
+
+        if prev is not None:
+            merged = merge_vowels(prev, curr)
+
+            if merged is not None:
+                output[-1] += token
+                prev = merged
+                continue
+
+        output.append(token)
+        prev = curr
+
+    return output
+
+
+def get_vowel_features(token, table):
+    """
+    Return a (lead, syllabic, last_short, lead_short) tuple describing the
+    token as a (part of a) diphthong, or None if it cannot be such, i.e. if it
+    includes characters other than vowels, diacritics and length marks.
+
+    The token is split into vowels, each with the diacritics and length marks
+    that follow it; those that precede the first vowel, if any, are the lead.
+    Then lead is whether there is such, syllabic is the number of vowels
+    without the non-syllabic diacritic, last_short is whether the last vowel
+    has this diacritic (None if there are no vowels) and lead_short is whether
+    the lead has it.
+
+    Helper for are_diphthong(tokenA, tokenB) and VowelFeatures.
+    """
+    lead = False
+    lead_short = False
+    syllabic = 0
+    last_short = None
+
+    for char in token:
+        flags = table[char]
+
+        if flags & ipa.VOWEL:
+            if last_short is False:
+                syllabic += 1
+            last_short = False
+        elif flags & (ipa.DIACRITIC | ipa.LENGTH):
+            if last_short is None:
+                lead = True
+                lead_short = lead_short or char == NON_SYLLABIC
+            elif char == NON_SYLLABIC:
+                last_short = True
         else:
-            break
+            return None
+
+    if last_short is False:
+        syllabic += 1
+
+    return lead, syllabic, last_short, lead_short
+
+
+def merge_vowels(featuresA, featuresB):
+    """
+    Return the vowel features of the concatenation of two tokens, given those
+    of the tokens, if the concatenation can be a diphthong, i.e. it consists
+    of vowels (with diacritics and length marks) of which no more than one is
+    syllabic. Return None otherwise.
+
+    Helper for are_diphthong(tokenA, tokenB) and group_diphthongs(..).
+    """
+    if featuresA is None or featuresB is None:
+        return None
+
+    leadA, syllabicA, last_shortA, lead_shortA = featuresA
+    leadB, syllabicB, last_shortB, lead_shortB = featuresB
+
+    if last_shortA is None:
+        # the first token has no vowels, so it is all lead
+        lead = leadA or leadB
+        lead_short = lead_shortA or lead_shortB
+        syllabic = syllabicB
+        last_short = last_shortB
     else:
-        if len([x for x in subtokens if not is_short(x)]) < 2:
-            return True
+        # the lead of the second token goes with the last vowel of the first
+        lead = leadA
+        lead_short = lead_shortA
+        syllabic = syllabicA + syllabicB
 
-    return False
+        if lead_shortB and not last_shortA:
+            syllabic -= 1
 
+        if last_shortB is None:
+            last_short = last_shortA or lead_shortB
+        else:
+            last_short = last_shortB
 
-def tokenise_word(
-    string, strict=False, replace=False, tones=False, unknown=False
-):
+    if lead or syllabic > 1:
+        return None
+
+    return lead, syllabic, last_short, lead_short
+
+
+"""
+The non-syllabic diacritic, which marks the non-syllabic vowels of a
+diphthong.
+"""
+NON_SYLLABIC = '\u032f'
+
+
+class VowelFeatures(dict):
+    """
+    Dict mapping tokens to their vowel features, as returned by
+    get_vowel_features. Each distinct token is looked into on its first
+    lookup.
     """
-    Tokenise the string into a list of tokens or raise ValueError if it cannot
-    be tokenised (relatively) unambiguously. The string should not include
-    whitespace, i.e. it is assumed to be a single word.
 
-    If strict=False, allow non-standard letters and diacritics, as well as
-    initial diacritic-only tokens (e.g. pre-aspiration). If replace=True,
-    replace some common non-IPA symbols with their IPA counterparts. If
-    tones=False, ignore tone symbols. If unknown=False, ignore symbols that
-    cannot be classified into a relevant category.
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
 
-    Helper for tokenise(string, ..).
+    def __missing__(self, token):
+        features = get_vowel_features(token, self.table)
+        self[token] = features
+        return features
+
+
+@functools.lru_cache(maxsize=None)
+def get_word_re():
     """
-    string = normalise(string)
+    Return the regex matching the words of a string, which are delimited by
+    whitespace as in str.split(). The regex is compiled on first use.
+    """
+    import re
 
-    if replace:
-        string = ipa.replace_substitutes(string)
+    return re.compile(r'\S+')
 
-    tokens = []
 
-    for index, char in enumerate(string):
-        if ipa.is_letter(char, strict):
-            if tokens and ipa.is_tie_bar(string[index - 1]):
-                tokens[-1] += char
-            else:
-                tokens.append(char)
+"""
+Actions that tokenise_word can take on encountering a character.
+"""
+LETTER = 1
+TIE_BAR = 2
+DIACRITIC = 3
+UNKNOWN = 4
+TONE = 5
+ACCENT = 6
+SKIP = 7
+INVALID = 8
+
+
+"""
+Token classes, as used by clusterise and cv_skeleton: tokens that include a
+vowel, tokens that include letters but no vowels, and all the rest (tones and
+unknown symbols).
+"""
+VOWEL = 'V'
+CONSONANT = 'C'
+OTHER = 'X'
 
-        elif ipa.is_tie_bar(char):
-            if not tokens:
-                raise ValueError(f'The string starts with a tie bar: {string}')
-            tokens[-1] += char
 
-        elif ipa.is_diacritic(char, strict) or ipa.is_length(char):
-            if tokens:
+"""
+Backends for distributing the work of Tokeniser.tokenise_many(..) and
+Tokeniser.clusterise_many(..) among several workers. Threads only pay off on
+free-threaded builds of CPython, where they run in parallel.
+"""
+PROCESS = 'process'
+THREAD = 'thread'
+
+
+"""
+The profiling.Profile that is currently collecting stats in the current
+context (i.e. thread or asyncio task), if any. Tokenisers check this once per
+string and once per word (before caching), and only take the instrumented
+code path if it is not None. It lives here rather than in the profiling
+module, so that the latter is only imported if profiling is used.
+"""
+active_profile = contextvars.ContextVar('active_profile', default=None)
+
+
+class Actions(dict):
+    """
+    Dict mapping characters to the actions taken by a tokeniser with a given
+    set of options. Like the chart's classification tables which it builds
+    upon, it is populated on demand.
+    """
+
+    def __init__(self, table, strict, tones, unknown):
+        super().__init__()
+        self.table = table
+        self.strict = strict
+        self.tones = tones
+        self.unknown = unknown
+
+    def __missing__(self, char):
+        flags = self.table[char]
+
+        if flags & ipa.LETTER:
+            action = LETTER
+        elif flags & ipa.TIE_BAR:
+            action = TIE_BAR
+        elif flags & (ipa.DIACRITIC | ipa.LENGTH):
+            action = DIACRITIC
+        elif self.tones and flags & ipa.TONE:
+            action = ACCENT if unicodedata.combining(char) else TONE
+        elif flags & ipa.SUPRASEGMENTAL:
+            action = SKIP
+        elif self.strict:
+            action = INVALID
+        elif self.unknown:
+            action = UNKNOWN
+        else:
+            action = SKIP
+
+        self[char] = action
+        return action
+
+
+class TokenClasses(dict):
+    """
+    Dict mapping tokens to their classes (VOWEL, CONSONANT or OTHER). Each
+    distinct token is classified on its first lookup.
+    """
+
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def __missing__(self, token):
+        flags = 0
+
+        for char in token:
+            flags |= self.table[char]
+
+        if flags & ipa.VOWEL:
+            token_class = VOWEL
+        elif flags & ipa.LETTER:
+            token_class = CONSONANT
+        else:
+            token_class = OTHER
+
+        self[token] = token_class
+        return token_class
+
+
+class Tokeniser:
+    """
+    Tokeniser with a fixed set of options. The per-character decisions are
+    worked out once for the given options, so that tokenising does not need
+    to branch on the options again.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(
+        self,
+        strict=False,
+        replace=False,
+        diphthongs=False,
+        tones=False,
+        unknown=False,
+        merge=None,
+        cache_size=0,
+        chart=None,
+    ):
+        """
+        Set the options; these have the same meaning as the keyword arguments
+        of tokenise(string, ..). If cache_size is not zero, remember the tokens
+        of up to that many of the most recently seen words; if it is None, the
+        cache is unbounded. If chart is None, the default chart is used.
+        """
+        self.strict = strict
+        self.replace = replace
+        self.diphthongs = diphthongs
+        self.tones = tones
+        self.unknown = unknown
+        self.merge = merge
+        self.cache_size = cache_size
+        self.chart = ipa.get_chart() if chart is None else chart
+
+        self.options = (
+            strict,
+            replace,
+            diphthongs,
+            tones,
+            unknown,
+            merge,
+            cache_size,
+            chart,
+        )
+
+        table = self.chart.get_table(strict)
+
+        self.actions = Actions(table, strict, tones, unknown)
+        self.token_classes = TokenClasses(table)
+        self.vowel_features = VowelFeatures(self.chart.strict_table)
+
+        # what tokenise(string) calls for each word if it is not profiled,
+        # i.e. process_word but without counting the cache lookups
+        self.lookup_word = self.process_word
+
+        if cache_size != 0:
+            self.word_cache = functools.lru_cache(cache_size)(
+                self.process_word
+            )
+            self.lookup_word = self.word_cache
+            self.process_word = self.process_word_cached
+
+    def tokenise_word(self, string):
+        """
+        Tokenise the string into a list of tokens or raise ValueError if it
+        cannot be tokenised (relatively) unambiguously. The string should not
+        include whitespace, i.e. it is assumed to be a single word.
+
+        Unlike tokenise(string), this does not group diphthongs or apply the
+        merge function.
+        """
+        string = normalise(string, self.chart)
+
+        if self.replace:
+            string = self.chart.replace_substitutes(string)
+
+        return self.tokenise_normalised(string)
+
+    def tokenise_normalised(self, string):
+        """
+        Like tokenise_word(string) but for strings that have already been
+        normalised and, if replace=True, had their substitutes replaced.
+        """
+        actions = self.actions
+        tokens = []
+        prev_action = None
+
+        for char in string:
+            action = actions[char]
+
+            if action == LETTER:
+                if tokens and prev_action == TIE_BAR:
+                    tokens[-1] += char
+                else:
+                    tokens.append(char)
+
+            elif action == TIE_BAR:
+                if not tokens:
+                    raise ValueError(
+                        f'The string starts with a tie bar: {string}'
+                    )
                 tokens[-1] += char
-            else:
-                if strict:
+
+            elif action == DIACRITIC:
+                if tokens:
+                    tokens[-1] += char
+                elif self.strict:
                     raise ValueError(
                         f'The string starts with a diacritic: {string}'
                     )
                 else:
                     tokens.append(char)
 
-        elif tones and ipa.is_tone(char, strict):
-            if unicodedata.combining(char):
+            elif action == TONE:
+                if tokens and actions[tokens[-1][-1]] in (TONE, ACCENT):
+                    tokens[-1] += char
+                else:
+                    tokens.append(char)
+
+            elif action == ACCENT:
                 if not tokens:
                     raise ValueError(
                         f'The string starts with an accent mark: {string}'
                     )
                 tokens[-1] += char
-            elif tokens and ipa.is_tone(tokens[-1][-1], strict):
-                tokens[-1] += char
-            else:
-                tokens.append(char)
 
-        elif ipa.is_suprasegmental(char, strict):
-            pass
+            elif action == UNKNOWN:
+                tokens.append(char)
 
-        else:
-            if strict:
+            elif action == INVALID:
                 raise ValueError(
-                    f'Unrecognised char: {char} ({ unicodedata.name(char)})'
+                    f'Unrecognised char: {char} ({unicodedata.name(char)})'
                 )
-            elif unknown:
-                tokens.append(char)
+
+            prev_action = action
+
+        return tokens
+
+    def tokenise(self, string):
+        """
+        Tokenise an IPA string into a list of tokens. Raise ValueError if
+        there is a problem.
+        """
+        stats = active_profile.get()
+
+        if stats is not None:
+            return self.tokenise_profiled(string, stats)
+
+        output = []
+        lookup_word = self.lookup_word
+
+        for word in string.split():
+            output.extend(lookup_word(word))
+
+        return output
+
+    def tokenise_profiled(self, string, stats):
+        """
+        Like tokenise(string) but record the time taken and the number of
+        words into the given profiling.Profile.
+        """
+        start = time.perf_counter_ns()
+        words = string.split()
+        output = []
+
+        try:
+            for word in words:
+                output.extend(self.process_word(word))
+        finally:
+            stats.record('tokenise', time.perf_counter_ns() - start)
+            stats.record_words(len(words))
+
+        return output
+
+    def process_word(self, word):
+        """
+        Tokenise the word and group its tokens using the merge functions. This
+        is the step that is cached if the tokeniser has a cache_size.
+        """
+        stats = active_profile.get()
+
+        if stats is not None:
+            return self.process_word_profiled(word, stats)
+
+        return self.group_tokens(self.tokenise_word(word))
+
+    def process_word_cached(self, word):
+        """
+        Like process_word(word) but look the word up in the cache first. This
+        replaces process_word if the tokeniser has a cache_size; the lookup is
+        recorded here and the miss, if any, by process_word_profiled(..), so
+        that these are counted in the same way, whoever the caller is.
+        """
+        stats = active_profile.get()
+
+        if stats is not None:
+            stats.record_lookup()
+
+        return self.word_cache(word)
+
+    def process_word_profiled(self, word, stats):
+        """
+        Like process_word(word) but record the time taken by each stage into
+        the given profiling.Profile, as well as the cache miss, if the
+        tokeniser has a cache.
+        """
+        if self.cache_size != 0:
+            stats.record_miss()
+
+        clock = time.perf_counter_ns
+        start = clock()
+
+        string = normalise(word, self.chart)
+        end = clock()
+        stats.record('normalise', end - start)
+
+        if self.replace:
+            start = end
+            string = self.chart.replace_substitutes(string)
+            end = clock()
+            stats.record('replace', end - start)
+
+        start = end
+        try:
+            tokens = self.tokenise_normalised(string)
+        finally:
+            end = clock()
+            stats.record('classify', end - start)
+
+        if self.diphthongs:
+            start = end
+            tokens = group_diphthongs(self.vowel_features, tokens)
+            end = clock()
+            stats.record('diphthongs', end - start)
+
+        if self.merge is not None:
+            start = end
+            tokens = group(self.merge, tokens)
+            stats.record('merge', clock() - start)
+
+        return tokens
+
+    def group_tokens(self, tokens):
+        """
+        Group the tokens of a word into diphthongs, if the diphthongs option
+        is set, and then using the merge function, if there is one.
+        """
+        if self.diphthongs:
+            tokens = group_diphthongs(self.vowel_features, tokens)
+
+        if self.merge is not None:
+            tokens = group(self.merge, tokens)
+
+        return tokens
+
+    def tokenise_spans(self, string):
+        """
+        Tokenise an IPA string and return a list of (token, start, end)
+        tuples, where string[start:end] is the part of the input that the
+        token comes from. The spans take into account the changes made by
+        normalising and by replacing substitutes; a token that is made of
+        decomposed or replaced characters spans the respective originals.
+        Raise ValueError if there is a problem.
+        """
+        output = []
+
+        for match in get_word_re().finditer(string):
+            word_spans = self.tokenise_word_spans(match.group())
+            offset = match.start()
+
+            for token, start, end in word_spans:
+                output.append((token, start + offset, end + offset))
+
+        return output
+
+    def tokenise_word_spans(self, word):
+        """
+        Like tokenise_spans(string) but for a single word. Unlike the latter,
+        this bypasses the cache.
+        """
+        chart = self.chart
+        string, spans = normalise_spans(word, chart)
+
+        if self.replace:
+            string, spans = substitute_spans(
+                string, spans, chart.get_replacements_re(), chart.replacements
+            )
+
+        tokens = self.group_tokens(self.tokenise_normalised(string))
+
+        actions = self.actions
+        kept = [i for i, char in enumerate(string) if actions[char] != SKIP]
+
+        output = []
+        index = 0
+
+        for token in tokens:
+            token_spans = [spans[i] for i in kept[index : index + len(token)]]
+            index += len(token)
+
+            output.append(
+                (
+                    token,
+                    min(start for start, _ in token_spans),
+                    max(end for _, end in token_spans),
+                )
+            )
+
+        return output
+
+    def cache_info(self):
+        """
+        Return a named tuple with the hits, misses, maxsize and currsize of the
+        word cache, or None if the tokeniser does not have a cache.
+        """
+        if self.cache_size == 0:
+            return None
+
+        return self.word_cache.cache_info()
+
+    def cache_clear(self):
+        """
+        Empty the word cache and reset its statistics, if there is a cache.
+        """
+        if self.cache_size != 0:
+            self.word_cache.cache_clear()
+
+    def clusterise(self, string):
+        """
+        Tokenise an IPA string and return a list of consonant and vowel
+        clusters. Raise ValueError if there is a problem.
+
+        Tokens without vowels, including tones and unknown symbols, are put in
+        the consonant clusters.
+        """
+        token_classes = self.token_classes
+        clusters = []
+        prev_is_vowel = None
+
+        for token in self.tokenise(string):
+            is_vowel = token_classes[token] == VOWEL
+
+            if is_vowel == prev_is_vowel:
+                clusters[-1] += token
             else:
-                pass
+                clusters.append(token)
+                prev_is_vowel = is_vowel
+
+        return clusters
+
+    def classify_tokens(self, tokens):
+        """
+        Return the list of the classes (VOWEL, CONSONANT or OTHER) of the given
+        tokens.
+        """
+        return [self.token_classes[token] for token in tokens]
+
+    def cv_skeleton(self, string):
+        """
+        Tokenise an IPA string and return its CV skeleton: a string with one
+        character per token, V for tokens that include a vowel, C for those
+        that include other letters and X for the rest. Raise ValueError if
+        there is a problem.
+        """
+        return ''.join(self.classify_tokens(self.tokenise(string)))
+
+    def tokenise_many(
+        self,
+        strings,
+        flat=False,
+        workers=None,
+        chunk_size=None,
+        backend=PROCESS,
+    ):
+        """
+        Tokenise each of the strings of the given iterable. Return a list of
+        token lists or, if flat=True, a (tokens, offsets) tuple where tokens is
+        the concatenation of these lists and the tokens of the i-th string are
+        tokens[offsets[i]:offsets[i+1]]. Raise ValueError if there is a
+        problem with any of the strings.
+
+        Repeated strings are only tokenised once. If workers is greater than
+        one, the work is split into chunks of chunk_size distinct strings and
+        these are distributed among that many processes or, if backend is
+        THREAD, threads.
+        """
+        return self.process_many(
+            'tokenise', strings, flat, workers, chunk_size, backend
+        )
+
+    def clusterise_many(
+        self,
+        strings,
+        flat=False,
+        workers=None,
+        chunk_size=None,
+        backend=PROCESS,
+    ):
+        """
+        Like tokenise_many(strings, ..) but for clusterise(string).
+        """
+        return self.process_many(
+            'clusterise', strings, flat, workers, chunk_size, backend
+        )
+
+    def process_many(
+        self,
+        method,
+        strings,
+        flat=False,
+        workers=None,
+        chunk_size=None,
+        backend=PROCESS,
+    ):
+        """
+        Apply the specified method to each of the strings, serially or in
+        parallel depending on the value of workers.
+
+        Helper for tokenise_many(strings, ..) and clusterise_many(strings, ..).
+        """
+        if backend not in (PROCESS, THREAD):
+            raise ValueError(f'Unknown backend: {backend}')
+
+        if workers is not None and workers > 1:
+            strings = list(strings)
+            outputs = self.map_in_parallel(
+                method, strings, workers, chunk_size, backend
+            )
+            func = outputs.__getitem__
+        else:
+            func = getattr(self, method)
+
+        return collect(func, strings, flat)
+
+    def map_in_parallel(
+        self, method, strings, workers, chunk_size=None, backend=PROCESS
+    ):
+        """
+        Return a dict mapping each of the distinct strings to the output of
+        the specified method, as computed by a pool of worker processes or
+        threads.
+
+        Helper for tokenise_many(strings, ..) and clusterise_many(strings, ..).
+        """
+        unique = list(dict.fromkeys(strings))
+
+        if chunk_size is None:
+            chunk_size = max(-(-len(unique) // (workers * 4)), 1)
+
+        chunks = [
+            unique[index : index + chunk_size]
+            for index in range(0, len(unique), chunk_size)
+        ]
+
+        if backend == THREAD:
+            func = functools.partial(apply_to_chunk, self, method)
+        else:
+            func = functools.partial(work_on_chunk, method)
+
+        outputs = {}
+
+        with self.make_pool(workers, backend) as executor:
+            for chunk, result in zip(chunks, executor.map(func, chunks)):
+                outputs.update(zip(chunk, result))
+
+        return outputs
+
+    def make_pool(self, workers, backend=PROCESS):
+        """
+        Return a ProcessPoolExecutor with the given number of workers, each of
+        which compiles its own copy of this tokeniser once, so that the chart
+        is not reloaded for each task. Raise ValueError if the merge function
+        cannot be pickled and thus cannot be sent to the workers.
+
+        If backend is THREAD, return a ThreadPoolExecutor instead; its threads
+        share this tokeniser, which is safe as its state is either immutable
+        or only ever extended with deterministic values.
+        """
+        # these are imported here as they are slow to import and only needed
+        # for parallel processing
+        if backend == THREAD:
+            from concurrent.futures import ThreadPoolExecutor
+
+            return ThreadPoolExecutor(workers)
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.ensure_picklable()
+
+        return ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=self.options
+        )
+
+    def ensure_picklable(self):
+        """
+        Raise ValueError if the tokeniser's options, i.e. its merge function,
+        cannot be pickled and thus cannot be sent to worker processes.
+
+        Helper for make_pool(workers, ..) and aio.aprocess_many(..).
+        """
+        import pickle
+
+        try:
+            pickle.dumps(self.options)
+        except (pickle.PicklingError, AttributeError, TypeError) as error:
+            raise ValueError(
+                f'The merge function cannot be pickled: {self.merge!r}; '
+                'use a module-level function or do not use processes'
+            ) from error
+
+
+"""
+The tokeniser of the current process, if the latter is a worker started by
+Tokeniser.make_pool(workers).
+"""
+worker_tokeniser = None
 
-    return tokens
+
+def init_worker(*options):
+    """
+    Compile the tokeniser of a worker process.
+
+    Helper for Tokeniser.make_pool(workers).
+    """
+    global worker_tokeniser
+    worker_tokeniser = compile(*options)
+
+
+def work_on_chunk(method, strings):
+    """
+    Apply the specified method of the worker's tokeniser to each of the
+    strings and return the list of outputs.
+
+    Helper for Tokeniser.map_in_parallel(..).
+    """
+    return apply_to_chunk(worker_tokeniser, method, strings)
+
+
+def work_with_options(options, method, strings):
+    """
+    Apply the specified method of the tokeniser with the given options to
+    each of the strings and return the list of outputs. Unlike
+    work_on_chunk(..), this works in any process pool, not only in those
+    created by Tokeniser.make_pool(workers); each worker compiles the
+    tokeniser once, on its first task with these options.
+
+    Helper for aio.aprocess_many(..).
+    """
+    return compile(*options).process_many(method, strings)
+
+
+def apply_to_chunk(tokeniser, method, strings):
+    """
+    Apply the specified method of the tokeniser to each of the strings and
+    return the list of outputs.
+
+    Helper for Tokeniser.map_in_parallel(..) and work_on_chunk(..).
+    """
+    func = getattr(tokeniser, method)
+    return [func(string) for string in strings]
+
+
+def collect(func, strings, flat=False):
+    """
+    Apply the func to each of the strings, calling it only once per distinct
+    string. Return the outputs in the format specified by flat.
+
+    Helper for Tokeniser.process_many(..).
+    """
+    seen = {}
+    output = []
+
+    if flat:
+        offsets = array('Q', [0])
+
+    for string in strings:
+        if string in seen:
+            tokens = seen[string][:]
+        else:
+            tokens = seen[string] = func(string)
+
+        if flat:
+            output.extend(tokens)
+            offsets.append(len(output))
+        else:
+            output.append(tokens)
+
+    if flat:
+        return output, offsets
+
+    return output
+
+
+def compile(
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    cache_size=0,
+    chart=None,
+):
+    """
+    Return a Tokeniser with the given options; these have the same meaning as
+    the keyword arguments of tokenise(string, ..). If cache_size is not zero,
+    the tokeniser remembers the tokens of up to that many words, which pays off
+    with corpora in which the same words occur again and again. If chart is
+    not None, the tokeniser uses it instead of the default chart.
+
+    The most recently used tokenisers are cached, so compiling the same options
+    twice returns the same instance, whether these are given as positional or
+    as keyword arguments. If the merge function or the chart is not hashable,
+    a new tokeniser is returned each time.
+
+    Part of ipatok's public API.
+    """
+    options = (
+        strict,
+        replace,
+        diphthongs,
+        tones,
+        unknown,
+        merge,
+        cache_size,
+        chart,
+    )
+
+    try:
+        return compile_cached(*options)
+    except TypeError:
+        # unhashable options cannot be cached
+        return Tokeniser(*options)
+
+
+@functools.lru_cache(maxsize=32)
+def compile_cached(
+    strict, replace, diphthongs, tones, unknown, merge, cache_size, chart
+):
+    """
+    Return a Tokeniser with the given options. The arguments are always
+    positional, so that lru_cache maps the same options to the same key.
+
+    Helper for compile(..).
+    """
+    return Tokeniser(
+        strict, replace, diphthongs, tones, unknown, merge, cache_size, chart
+    )
+
+
+def tokenise_word(
+    string, strict=False, replace=False, tones=False, unknown=False
+):
+    """
+    Tokenise the string into a list of tokens or raise ValueError if it cannot
+    be tokenised (relatively) unambiguously. The string should not include
+    whitespace, i.e. it is assumed to be a single word.
+
+    If strict=False, allow non-standard letters and diacritics, as well as
+    initial diacritic-only tokens (e.g. pre-aspiration). If replace=True,
+    replace some common non-IPA symbols with their IPA counterparts. If
+    tones=False, ignore tone symbols. If unknown=False, ignore symbols that
+    cannot be classified into a relevant category.
+
+    Helper for tokenise(string, ..).
+    """
+    tokeniser = compile(strict, replace, False, tones, unknown)
+    return tokeniser.tokenise_word(string)
 
 
 def tokenise(
@@ -164,6 +1093,7 @@ def tokenise(
     tones=False,
     unknown=False,
     merge=None,
+    chart=None,
 ):
     """
     Tokenise an IPA string into a list of tokens. Raise ValueError if there is
@@ -174,28 +1104,42 @@ def tokenise(
     counterparts. If diphthongs=True, try to group diphthongs into single
     tokens. If tones=True, do not ignore tone symbols. If unknown=True, do not
     ignore symbols that cannot be classified into a relevant category. If merge
-    is not None, use it for within-word token grouping.
+    is not None, use it for within-word token grouping. If chart is not None,
+    use it instead of the default IPA chart (see ipa.load_chart).
 
     Part of ipatok's public API.
     """
-    words = string.strip().split()
-    output = []
-
-    for word in words:
-        tokens = tokenise_word(word, strict, replace, tones, unknown)
+    tokeniser = compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return tokeniser.tokenise(string)
 
-        if diphthongs:
-            tokens = group(are_diphthong, tokens)
 
-        if merge is not None:
-            tokens = group(merge, tokens)
+def clusterise(
+    string,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+):
+    """
+    Tokenise an IPA string and return a list of consonant and vowel clusters.
+    Raise ValueError if there is a problem.
 
-        output.extend(tokens)
+    The keyword arguments are the same as those of tokenise.
 
-    return output
+    Part of ipatok's public API.
+    """
+    tokeniser = compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return tokeniser.clusterise(string)
 
 
-def clusterise(
+def cv_skeleton(
     string,
     strict=False,
     replace=False,
@@ -203,32 +1147,109 @@ def clusterise(
     tones=False,
     unknown=False,
     merge=None,
+    chart=None,
 ):
     """
-    Tokenise an IPA string and return a list of consonant and vowel clusters.
+    Tokenise an IPA string and return its CV skeleton: a string with one
+    character per token, V for tokens that include a vowel, C for tokens that
+    include other letters, and X for the rest (tones and unknown symbols).
     Raise ValueError if there is a problem.
 
-    Forward the keyword arguments to tokenise.
+    The keyword arguments are the same as those of tokenise.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return tokeniser.cv_skeleton(string)
+
+
+def tokenise_spans(
+    string,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+):
+    """
+    Tokenise an IPA string and return a list of (token, start, end) tuples,
+    where string[start:end] is the part of the input that the token comes
+    from. Raise ValueError if there is a problem.
+
+    The keyword arguments are the same as those of tokenise.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return tokeniser.tokenise_spans(string)
+
+
+def tokenise_many(
+    strings,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+    flat=False,
+    workers=None,
+    chunk_size=None,
+    backend=PROCESS,
+):
+    """
+    Tokenise each of the IPA strings of the given iterable. Return a list of
+    token lists or, if flat=True, a (tokens, offsets) tuple where tokens is
+    the concatenation of these lists and the tokens of the i-th string are
+    tokens[offsets[i]:offsets[i+1]]. Raise ValueError if there is a problem.
+
+    If workers is greater than one, distribute the strings among that many
+    processes, in chunks of chunk_size distinct strings; the merge function, if
+    any, should be picklable then. If backend='thread', use threads instead,
+    which run in parallel on free-threaded builds of CPython. The other
+    keyword arguments are the same as those of tokenise.
 
     Part of ipatok's public API.
     """
+    tokeniser = compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return tokeniser.tokenise_many(strings, flat, workers, chunk_size, backend)
 
-    def groupit(ipalist):
-        """Merge subsequent consonants and vowels to clusters."""
-        tmp = []
-        it = iter(ipalist)
-        nextit = next(it)
-        for char in ipalist:
-            charcv = any(ipa.is_vowel(i) for i in char)
-            while any(ipa.is_vowel(i) for i in nextit) != charcv:
-                yield ''.join(tmp)
-                tmp = []
-                nextit = next(it)
-            tmp.append(char)
-        yield ''.join(tmp)
 
-    args = list(locals().values())[:-1]  # last arg would be groupit()
-    return [i for i in groupit(tokenise(*args)) if i]
+def clusterise_many(
+    strings,
+    strict=False,
+    replace=False,
+    diphthongs=False,
+    tones=False,
+    unknown=False,
+    merge=None,
+    chart=None,
+    flat=False,
+    workers=None,
+    chunk_size=None,
+    backend=PROCESS,
+):
+    """
+    Like tokenise_many but return the consonant and vowel clusters of each of
+    the IPA strings.
+
+    Part of ipatok's public API.
+    """
+    tokeniser = compile(
+        strict, replace, diphthongs, tones, unknown, merge, chart=chart
+    )
+    return tokeniser.clusterise_many(
+        strings, flat, workers, chunk_size, backend
+    )
 
 
 def replace_digits_with_chao(string, inverse=False):
@@ -263,3 +1284,5 @@ Provide for the alternative spellings.
 """
 tokenize = tokenise
 clusterize = clusterise
+tokenize_many = tokenise_many
+clusterize_many = clusterise_many
@@ -0,0 +1,188 @@
+from array import array
+
+from ipatok import ipa
+from ipatok import tokens
+
+
+class Vocabulary:
+    """
+    Bidirectional mapping between segments (i.e. tokens) and consecutive
+    integer IDs, for turning tokenised IPA strings into compact arrays.
+
+    Part of ipatok's public API.
+    """
+
+    def __init__(self, segments=None, grow=True, chart=None):
+        """
+        Init the vocabulary with the given segments, in this order; if these
+        are not specified, the letters of the chart (by default, the IPA chart)
+        are used instead. If grow is True, segments that are not in the
+        vocabulary are added to it as they are encountered; otherwise encoding
+        them raises ValueError.
+        """
+        if segments is None:
+            if chart is None:
+                chart = ipa.get_chart()
+
+            segments = sorted(chart.consonants | chart.vowels)
+
+        self.grow = grow
+
+        self.segments = []
+        self.ids = {}
+
+        for segment in segments:
+            self.add(segment)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __contains__(self, segment):
+        return segment in self.ids
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __eq__(self, other):
+        if not isinstance(other, Vocabulary):
+            return NotImplemented
+
+        return self.segments == other.segments
+
+    def add(self, segment):
+        """
+        Add the segment to the vocabulary, unless it is already there, and
+        return its ID. Raise ValueError if the segment is not a non-empty
+        string without whitespace.
+        """
+        if segment in self.ids:
+            return self.ids[segment]
+
+        if not isinstance(segment, str) or segment.split() != [segment]:
+            raise ValueError(f'Invalid segment: {segment!r}')
+
+        self.ids[segment] = len(self.segments)
+        self.segments.append(segment)
+
+        return self.ids[segment]
+
+    def get_id(self, segment):
+        """
+        Return the ID of the segment, adding the latter to the vocabulary if
+        it is not there and grow is True. Raise ValueError otherwise.
+        """
+        try:
+            return self.ids[segment]
+        except KeyError:
+            if self.grow:
+                return self.add(segment)
+
+            raise ValueError(f'Unknown segment: {segment}') from None
+
+    def encode(self, tokens):
+        """
+        Return an array('I') with the IDs of the given tokens. Raise ValueError
+        if there is an unknown token and the vocabulary cannot grow.
+        """
+        ids = self.ids
+        get_id = self.get_id
+
+        return array('I', [ids[x] if x in ids else get_id(x) for x in tokens])
+
+    def encode_many(self, strings, tokeniser=None, as_numpy=False):
+        """
+        Tokenise each of the IPA strings of the given iterable and encode the
+        tokens. Return an (ids, offsets) tuple of array('I') and array('Q')
+        where the IDs of the i-th string's tokens are ids[offsets[i]:
+        offsets[i+1]]. Raise ValueError if there is a problem.
+
+        The tokeniser defaults to compile(), i.e. the default options of
+        tokenise. Repeated strings are only tokenised and encoded once, and no
+        token lists are kept around. If as_numpy is True, the arrays are
+        returned as NumPy arrays sharing the same memory; this requires NumPy
+        to be installed.
+        """
+        if tokeniser is None:
+            tokeniser = tokens.compile()
+
+        seen = {}
+        ids = array('I')
+        offsets = array('Q', [0])
+
+        for string in strings:
+            if string not in seen:
+                seen[string] = self.encode(tokeniser.tokenise(string))
+
+            ids.extend(seen[string])
+            offsets.append(len(ids))
+
+        if as_numpy:
+            return to_numpy(ids), to_numpy(offsets)
+
+        return ids, offsets
+
+    def decode(self, ids):
+        """
+        Return the list of segments with the given IDs. Raise ValueError if
+        there is an invalid ID.
+        """
+        segments = self.segments
+        output = []
+
+        try:
+            for index in ids:
+                if index < 0:
+                    raise IndexError(f'{index} is negative')
+                output.append(segments[index])
+        except (IndexError, TypeError) as error:
+            raise ValueError(f'Invalid segment ID: {error}') from None
+
+        return output
+
+    def decode_many(self, ids, offsets):
+        """
+        Inverse of encode_many(strings, ..): return the list of token lists
+        given the (ids, offsets) tuple of arrays.
+        """
+        return [
+            self.decode(ids[offsets[index] : offsets[index + 1]])
+            for index in range(len(offsets) - 1)
+        ]
+
+    def save(self, file_path):
+        """
+        Write the vocabulary to the specified file: a UTF-8 text file with one
+        segment per line, the line number being the segment's ID.
+        """
+        with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+            for segment in self.segments:
+                f.write(segment + '\n')
+
+    @classmethod
+    def load(cls, file_path, grow=True):
+        """
+        Return a vocabulary read from the specified file, as written by the
+        save method. Raise ValueError if the file is not a valid vocabulary.
+        """
+        with open(file_path, encoding='utf-8', newline='\n') as f:
+            segments = [line.rstrip('\n') for line in f]
+
+        if len(set(segments)) != len(segments):
+            raise ValueError(f'Repeated segments in {file_path}')
+
+        return cls(segments, grow=grow)
+
+
+def to_numpy(data):
+    """
+    Return a NumPy view of the given array.array, without copying it. Raise
+    ImportError if NumPy is not installed.
+
+    Helper for Vocabulary.encode_many(strings, ..).
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('as_numpy=True requires NumPy to be installed')
+
+    return numpy.frombuffer(data, dtype=f'u{data.itemsize}')